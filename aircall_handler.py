@@ -1,21 +1,31 @@
 """
 Aircall Webhook Handler & Audio Transcription
 Downloads Aircall recordings, transcribes via OpenAI, and hands off to the processor.
+
+Network calls are async and use the shared per-upstream clients in http_clients.
 """
 
 import os
-import io
+import re
+import time
+import asyncio
 import tempfile
 import logging
 import hashlib
 import hmac
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO, NamedTuple
 
-import requests
-from openai import AzureOpenAI
+import aiohttp
+from openai import AsyncAzureOpenAI
 from pydub import AudioSegment
 
+import artifact_store
+import audio_prep
+import http_clients
+import mp3_splitter
+from disk_cache import DiskCache
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -34,17 +44,45 @@ MAX_FILE_SIZE_BYTES = 24 * 1024 * 1024
 MAX_DURATION_SECONDS = 1400
 # 20-minute chunks in milliseconds
 CHUNK_DURATION_MS = 20 * 60 * 1000
+# Audio repeated at the start of each chunk so words at a cut aren't lost
+CHUNK_OVERLAP_MS = int(os.environ.get("CHUNK_OVERLAP_MS", "2000"))
+# How far back from the limit a chunk boundary may move to land in a pause
+CHUNK_PAUSE_WINDOW_MS = int(os.environ.get("CHUNK_PAUSE_WINDOW_MS", str(2 * 60 * 1000)))
+
+# Streaming downloads: recordings over this size spool to disk instead of RAM
+RECORDING_SPOOL_MAX_BYTES = int(os.environ.get("RECORDING_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+DOWNLOAD_CHUNK_BYTES = int(os.environ.get("DOWNLOAD_CHUNK_BYTES", str(1024 * 1024)))
+DOWNLOAD_MAX_RESUMES = int(os.environ.get("DOWNLOAD_MAX_RESUMES", "3"))
+
+# Chunked transcription: chunks in flight at once, and attempts per chunk
+TRANSCRIBE_CHUNK_CONCURRENCY = int(os.environ.get("TRANSCRIBE_CHUNK_CONCURRENCY", "4"))
+TRANSCRIBE_CHUNK_RETRIES = int(os.environ.get("TRANSCRIBE_CHUNK_RETRIES", "3"))
+
+# Transcripts cached by recording content hash (retries and duplicate webhooks skip transcription).
+# They are call content, so they expire with the stored artifacts (ARTIFACT_RETENTION_DAYS).
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+TRANSCRIPT_CACHE_PATH = os.environ.get("TRANSCRIPT_CACHE_PATH", os.path.join(DATA_DIR, "transcript_cache.sqlite3"))
+TRANSCRIPT_CACHE_MAX_MB = int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "200"))
+TRANSCRIPT_CACHE_TTL_SECONDS = artifact_store.ARTIFACT_RETENTION_DAYS * 86400
 
+_transcript_cache = DiskCache("Transcript cache", TRANSCRIPT_CACHE_PATH, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024,
+                              TRANSCRIPT_CACHE_TTL_SECONDS)
 
-def fetch_call(call_id: str) -> Optional[Dict[str, Any]]:
+_transcription_stats = {
+    name: {"transcriptions": 0, "upload_bytes": 0, "seconds": 0.0} for name in ("original", "normalized")
+}
+
+
+async def fetch_call(call_id: str) -> Optional[Dict[str, Any]]:
     """Fetch a call from the Aircall API and return parsed metadata (same format as webhook)."""
-    resp = requests.get(
+    session = http_clients.get_session("aircall")
+    async with session.get(
         f"https://api.aircall.io/v1/calls/{call_id}",
-        auth=(AIRCALL_API_ID, AIRCALL_API_KEY),
-        timeout=30,
-    )
-    resp.raise_for_status()
-    data = resp.json().get("call", {})
+        auth=aiohttp.BasicAuth(AIRCALL_API_ID, AIRCALL_API_KEY),
+        timeout=aiohttp.ClientTimeout(total=30),
+    ) as resp:
+        resp.raise_for_status()
+        data = (await resp.json()).get("call", {})
 
     recording_url = data.get("recording")
     if not recording_url:
@@ -131,13 +169,12 @@ def _build_call_meta(data: dict, recording_pending: bool = False) -> Dict[str, A
     }
 
 
-def poll_for_recording(call_id: str, max_attempts: int = 5, interval: int = 30) -> Optional[Dict[str, Any]]:
+async def poll_for_recording(call_id: str, max_attempts: int = 5, interval: int = 30) -> Optional[Dict[str, Any]]:
     """Poll the Aircall API until the recording URL is available."""
-    import time
     for attempt in range(1, max_attempts + 1):
-        time.sleep(interval)
+        await asyncio.sleep(interval)
         try:
-            fetched = fetch_call(call_id)
+            fetched = await fetch_call(call_id)
             if fetched and fetched.get("recording_url"):
                 logger.info(f"Recording URL found on attempt {attempt}/{max_attempts} for call {call_id}")
                 return fetched
@@ -170,107 +207,249 @@ def parse_webhook_payload(payload: dict) -> Optional[Dict[str, Any]]:
     return _build_call_meta(data)
 
 
-def download_recording(recording_url: str) -> bytes:
+class RecordingDownloadError(Exception):
+    """The recording could not be downloaded completely or failed its integrity check."""
+
+
+async def _stream_recording(recording_url: str, f: BinaryIO, offset: int,
+                            hasher) -> Tuple[int, Optional[int], str, str]:
+    """
+    Stream the recording into f from byte offset, resuming with a Range request
+    when the connection drops. hasher holds the MD5 of the first offset bytes;
+    if the server ignores Range the download restarts with a fresh one.
+    Returns (bytes written in total, expected size, etag, MD5 hex of the whole file).
+    """
+    session = http_clients.get_session("recordings")
+    expected_size = None
+    etag = ""
+    resumes = 0
+
+    while True:
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            async with session.get(recording_url, headers=headers, timeout=aiohttp.ClientTimeout(total=300)) as response:
+                if response.status == 416 and offset:
+                    # A previous attempt already fetched everything ("bytes */<size>")
+                    total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                    if total.isdigit() and int(total) == offset:
+                        return offset, offset, etag, hasher.hexdigest()
+                response.raise_for_status()
+
+                if offset and response.status != 206:
+                    # Range ignored — start over
+                    logger.info("Server ignored Range request, restarting download")
+                    await asyncio.to_thread(f.truncate, 0)
+                    await asyncio.to_thread(f.seek, 0)
+                    offset = 0
+                    hasher = hashlib.md5()
+
+                etag = response.headers.get("ETag", "").strip('"')
+                if response.status == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    total = content_range.rsplit("/", 1)[-1]
+                    expected_size = int(total) if total.isdigit() else None
+                elif response.content_length is not None:
+                    expected_size = response.content_length
+
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    await asyncio.to_thread(f.write, chunk)
+                    hasher.update(chunk)
+                    offset += len(chunk)
+
+            if expected_size is None or offset >= expected_size:
+                return offset, expected_size, etag, hasher.hexdigest()
+            raise aiohttp.ClientPayloadError(f"Connection closed at {offset}/{expected_size} bytes")
+
+        except (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError, asyncio.TimeoutError) as e:
+            resumes += 1
+            if resumes > DOWNLOAD_MAX_RESUMES:
+                raise RecordingDownloadError(f"Download failed after {DOWNLOAD_MAX_RESUMES} resumes: {e}") from e
+            logger.warning(f"Download interrupted at {offset / (1024 * 1024):.1f} MB ({e}) — resuming")
+
+
+def _verify_recording(size: int, expected_size: Optional[int], etag: str, md5_hex: str):
+    """Check the downloaded size and, for single-part S3 objects (ETag is the MD5), the checksum."""
+    if expected_size is not None and size != expected_size:
+        raise RecordingDownloadError(f"Recording size mismatch: got {size} bytes, expected {expected_size}")
+    if re.fullmatch(r"[0-9a-f]{32}", etag) and etag != md5_hex:
+        raise RecordingDownloadError(f"Recording checksum mismatch: MD5 {md5_hex}, ETag {etag}")
+
+
+def _hash_file(path: str):
+    """MD5 of an existing partial download, so a resumed download can still be verified."""
+    hasher = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_BYTES), b""):
+            hasher.update(block)
+    return hasher
+
+
+async def download_recording(recording_url: str, dest_path: Optional[str] = None) -> BinaryIO:
     """Download the MP3 recording from Aircall.
     The recording URL from the webhook is a pre-signed S3 URL,
     so no auth headers should be sent (they conflict with the S3 signature).
+
+    The body is streamed in chunks, never held in memory as a whole. With
+    dest_path it goes to dest_path + '.part' (resumed with a Range request if a
+    previous attempt left one behind) and is renamed into place once verified;
+    otherwise it goes to a SpooledTemporaryFile that moves to disk past
+    RECORDING_SPOOL_MAX_BYTES. Returns an open binary file positioned at 0 —
+    the caller closes it.
     """
     logger.info(f"Downloading recording from Aircall...")
 
-    response = requests.get(recording_url, timeout=300)
-    response.raise_for_status()
+    if dest_path:
+        part_path = dest_path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        hasher = await asyncio.to_thread(_hash_file, part_path) if offset else hashlib.md5()
+        if offset:
+            logger.info(f"Resuming download at {offset / (1024 * 1024):.1f} MB")
+        f = await asyncio.to_thread(open, part_path, "ab")
+    else:
+        offset = 0
+        hasher = hashlib.md5()
+        f = tempfile.SpooledTemporaryFile(max_size=RECORDING_SPOOL_MAX_BYTES)
 
-    content = response.content
-    size_mb = len(content) / (1024 * 1024)
-    logger.info(f"Downloaded recording: {size_mb:.1f} MB")
+    try:
+        size, expected_size, etag, md5_hex = await _stream_recording(recording_url, f, offset, hasher)
+        _verify_recording(size, expected_size, etag, md5_hex)
+    except RecordingDownloadError:
+        f.close()
+        if dest_path:
+            # A corrupt partial file must not be resumed
+            os.remove(dest_path + ".part")
+        raise
+    except BaseException:
+        f.close()
+        raise
 
-    return content
+    logger.info(f"Downloaded recording: {size / (1024 * 1024):.1f} MB")
 
+    if dest_path:
+        f.close()
+        await asyncio.to_thread(os.replace, dest_path + ".part", dest_path)
+        return await asyncio.to_thread(open, dest_path, "rb")
 
-def transcribe_audio(audio_content: bytes, duration_seconds: int = 0) -> str:
-    """
-    Transcribe audio using OpenAI gpt-4o-mini-transcribe.
-    Chunks if file is over 24MB or duration exceeds 1400 seconds.
-    """
-    client = AzureOpenAI(
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        api_key=AZURE_OPENAI_API_KEY,
-        api_version="2025-03-01-preview",
-    )
+    f.seek(0)
+    return f
 
-    needs_chunking = (
-        len(audio_content) > MAX_FILE_SIZE_BYTES
-        or duration_seconds > MAX_DURATION_SECONDS
-    )
 
-    if needs_chunking:
-        reason = "size" if len(audio_content) > MAX_FILE_SIZE_BYTES else "duration"
-        logger.info(f"Chunking audio ({reason}: {len(audio_content)/(1024*1024):.1f} MB, {duration_seconds}s)")
-        return _transcribe_chunked(client, audio_content)
-    else:
-        return _transcribe_single(client, audio_content)
+def _file_size(audio_file: BinaryIO) -> int:
+    """Size of an open file without reading it (leaves the position at 0)."""
+    audio_file.seek(0, os.SEEK_END)
+    size = audio_file.tell()
+    audio_file.seek(0)
+    return size
 
 
-def _transcribe_single(client: AzureOpenAI, audio_content: bytes) -> str:
-    """Transcribe a single audio file."""
-    audio_file = io.BytesIO(audio_content)
-    audio_file.name = "recording.mp3"
+class Transcription(NamedTuple):
+    text: str
+    # Trimmed audio -> original recording; [] when nothing was cut out
+    time_map: List[mp3_splitter.TimeSegment]
+    trimmed_seconds: float
 
-    response = client.audio.transcriptions.create(
-        model=AZURE_OPENAI_DEPLOYMENT,
-        file=audio_file,
-        language="en",
-    )
 
-    return response.text
+def _file_path(audio_file: BinaryIO) -> Optional[str]:
+    """On-disk path of an open file, or None for in-memory/spooled files."""
+    path = getattr(audio_file, "name", None)
+    return path if isinstance(path, str) and os.path.exists(path) else None
 
 
-def _transcribe_chunked(client: AzureOpenAI, audio_content: bytes) -> str:
-    """Split audio into 20-minute chunks, transcribe each, concatenate."""
-    tmp_dir = tempfile.mkdtemp(prefix="aircall_")
-    chunk_paths = []
-    transcripts = []
+def _hash_recording(audio_file: BinaryIO) -> str:
+    """SHA-256 of the recording's content (leaves the position at 0)."""
+    hasher = hashlib.sha256()
+    audio_file.seek(0)
+    for block in iter(lambda: audio_file.read(1024 * 1024), b""):
+        hasher.update(block)
+    audio_file.seek(0)
+    return hasher.hexdigest()
 
+
+async def transcribe_audio(audio_file: BinaryIO, duration_seconds: int = 0) -> Transcription:
+    """
+    Transcribe audio using OpenAI gpt-4o-mini-transcribe.
+    Results are cached by recording content, deployment and audio preparation
+    settings, so reprocessing the same recording returns immediately.
+    Takes an open binary file (see download_recording); the caller closes it.
+    """
+    content_hash = await asyncio.to_thread(_hash_recording, audio_file)
+    cache_key = f"{AZURE_OPENAI_DEPLOYMENT}:{audio_prep.settings_fingerprint()}:{content_hash}"
+    cached = await asyncio.to_thread(_transcript_cache.get, cache_key)
+    if cached is not None:
+        logger.info(f"Transcript cache hit for recording {content_hash[:12]}")
+        return Transcription(
+            cached["text"],
+            [mp3_splitter.TimeSegment(*segment) for segment in cached["time_map"]],
+            cached["trimmed_seconds"],
+        )
+
+    transcription = await _transcribe_uncached(audio_file, duration_seconds)
+    await asyncio.to_thread(_transcript_cache.put, cache_key, transcription._asdict())
+    return transcription
+
+
+async def _transcribe_uncached(audio_file: BinaryIO, duration_seconds: int) -> Transcription:
+    """
+    The recording is optionally normalized and has long silences trimmed first
+    (see audio_prep, both opt-in); chunks if the result is over 24MB or 1400
+    seconds, cutting in pauses where possible.
+    """
+    client = http_clients.get_azure_openai_client(
+        AZURE_OPENAI_ENDPOINT,
+        AZURE_OPENAI_API_KEY,
+        "2025-03-01-preview",
+    )
+
+    tmp_dir = tempfile.mkdtemp(prefix="aircall_")
+    normalized_file = None
+    started = time.monotonic()
     try:
-        # Write full audio to temp file for pydub
-        full_path = os.path.join(tmp_dir, "full_recording.mp3")
-        with open(full_path, "wb") as f:
-            f.write(audio_content)
-
-        audio = AudioSegment.from_mp3(full_path)
-        total_duration = len(audio)
-        logger.info(f"Total audio duration: {total_duration / 1000 / 60:.1f} minutes")
-
-        # Split into chunks
-        chunk_index = 0
-        start_ms = 0
-        while start_ms < total_duration:
-            end_ms = min(start_ms + CHUNK_DURATION_MS, total_duration)
-            chunk = audio[start_ms:end_ms]
-
-            chunk_path = os.path.join(tmp_dir, f"chunk_{chunk_index}.mp3")
-            chunk.export(chunk_path, format="mp3")
-            chunk_paths.append(chunk_path)
-
-            logger.info(f"Chunk {chunk_index}: {start_ms/1000/60:.1f}m - {end_ms/1000/60:.1f}m")
-
-            start_ms = end_ms
-            chunk_index += 1
-
-        # Transcribe each chunk
-        for i, chunk_path in enumerate(chunk_paths):
-            logger.info(f"Transcribing chunk {i+1}/{len(chunk_paths)}...")
-            with open(chunk_path, "rb") as f:
-                response = client.audio.transcriptions.create(
-                    model=AZURE_OPENAI_DEPLOYMENT,
-                    file=f,
-                    language="en",
-                )
-                transcripts.append(response.text)
-
-        return "\n\n".join(transcripts)
+        path = _file_path(audio_file)
+        if audio_prep.AUDIO_NORMALIZE_ENABLED and path:
+            normalized_path = os.path.join(tmp_dir, "normalized.mp3")
+            if await audio_prep.normalize(path, normalized_path):
+                normalized_file = audio_file = await asyncio.to_thread(open, normalized_path, "rb")
+                path = normalized_path
+
+        size = _file_size(audio_file)
+        needs_chunking = (
+            size > MAX_FILE_SIZE_BYTES
+            or duration_seconds > MAX_DURATION_SECONDS
+        )
+
+        # Silences pick the chunk cut points, and are trimmed only when enabled
+        silences = []
+        if (needs_chunking or audio_prep.SILENCE_TRIM_ENABLED) and path:
+            silences = await audio_prep.detect_silences(path)
+        trimmable = audio_prep.SILENCE_TRIM_ENABLED and any(
+            end - start >= audio_prep.SILENCE_TRIM_MIN_MS for start, end in silences
+        )
+
+        if not needs_chunking and not trimmable:
+            text = await _transcribe_single(client, audio_file)
+            _record_transcription(normalized_file is not None, size, started)
+            return Transcription(text, [], 0.0)
+
+        if needs_chunking:
+            reason = "size" if size > MAX_FILE_SIZE_BYTES else "duration"
+            logger.info(f"Chunking audio ({reason}: {size/(1024*1024):.1f} MB, {duration_seconds}s)")
+
+        chunks, time_map = await asyncio.to_thread(_split_into_chunks, audio_file, tmp_dir, silences)
+        trimmed_seconds = _trimmed_ms(time_map) / 1000
+        if trimmed_seconds:
+            logger.info(f"Trimmed {trimmed_seconds:.0f}s of silence before upload")
+
+        if len(chunks) == 1:
+            with open(chunks[0].path, "rb") as f:
+                text = await _transcribe_single(client, f)
+        else:
+            text = await _transcribe_chunked(client, chunks)
+        _record_transcription(normalized_file is not None, sum(os.path.getsize(c.path) for c in chunks), started)
+        return Transcription(text, time_map, trimmed_seconds)
 
     finally:
+        if normalized_file is not None:
+            normalized_file.close()
         # Clean up temp files
         import shutil
         try:
@@ -278,3 +457,174 @@ def _transcribe_chunked(client: AzureOpenAI, audio_content: bytes) -> str:
             logger.info("Cleaned up temp files")
         except Exception as e:
             logger.warning(f"Failed to clean up temp dir {tmp_dir}: {e}")
+
+
+def _record_transcription(normalized: bool, upload_bytes: int, started: float):
+    """Count upload bytes and end-to-end transcription time, split by whether audio was normalized."""
+    stats = _transcription_stats["normalized" if normalized else "original"]
+    stats["transcriptions"] += 1
+    stats["upload_bytes"] += upload_bytes
+    stats["seconds"] += time.monotonic() - started
+
+
+def purge_expired() -> int:
+    """Delete cached transcripts older than the retention period. Returns entries purged."""
+    return _transcript_cache.purge_expired()
+
+
+def transcription_stats() -> Dict[str, Any]:
+    """Upload bytes and latency per transcription, normalized vs original audio (for /health)."""
+    result = {}
+    for name, stats in _transcription_stats.items():
+        count = stats["transcriptions"]
+        result[name] = {
+            "transcriptions": count,
+            "avg_upload_mb": round(stats["upload_bytes"] / count / (1024 * 1024), 2) if count else None,
+            "avg_seconds": round(stats["seconds"] / count, 1) if count else None,
+        }
+    return dict(result, audio_prep=audio_prep.stats(), cache=_transcript_cache.stats())
+
+
+async def _transcribe_single(client: AsyncAzureOpenAI, audio_file: BinaryIO) -> str:
+    """Transcribe a single audio file."""
+    response = await client.audio.transcriptions.create(
+        model=AZURE_OPENAI_DEPLOYMENT,
+        file=("recording.mp3", audio_file),
+        language="en",
+    )
+
+    return response.text
+
+
+def _trimmed_ms(time_map: List[mp3_splitter.TimeSegment]) -> float:
+    """Source audio cut out before and between the kept segments."""
+    trimmed, source_end = 0.0, 0.0
+    for segment in time_map:
+        trimmed += segment.source_ms - source_end
+        source_end = segment.source_ms + segment.duration_ms
+    return trimmed
+
+
+def _split_into_chunks(audio_file: BinaryIO, tmp_dir: str,
+                       silences: List[Tuple[float, float]]) -> Tuple[List[mp3_splitter.Chunk], List[mp3_splitter.TimeSegment]]:
+    """
+    Cut the MP3 into chunk files within the duration and size limits, at frame
+    boundaries (no decode/re-encode), preferring to cut in a pause and dropping
+    long silences if SILENCE_TRIM_ENABLED; cuts mid-speech overlap by CHUNK_OVERLAP_MS.
+    Falls back to decoding with pydub if the file isn't a parseable MP3. Run in a thread.
+    """
+    try:
+        chunks, time_map = mp3_splitter.split_mp3(
+            audio_file, tmp_dir, CHUNK_DURATION_MS, MAX_FILE_SIZE_BYTES, overlap_ms=CHUNK_OVERLAP_MS,
+            silences=silences,
+            min_silence_ms=audio_prep.SILENCE_TRIM_MIN_MS if audio_prep.SILENCE_TRIM_ENABLED else 0,
+            keep_silence_ms=audio_prep.SILENCE_KEEP_MS, pause_window_ms=CHUNK_PAUSE_WINDOW_MS,
+        )
+    except ValueError as e:
+        logger.warning(f"Frame splitter failed ({e}) — decoding with pydub instead")
+        chunks, time_map = _split_into_chunks_pydub(audio_file, tmp_dir), []
+
+    logger.info(f"Total audio duration: {chunks[-1].end_ms / 1000 / 60:.1f} minutes")
+    for i, chunk in enumerate(chunks):
+        logger.info(f"Chunk {i}: {chunk.start_ms/1000/60:.1f}m - {chunk.end_ms/1000/60:.1f}m")
+    return chunks, time_map
+
+
+def _split_into_chunks_pydub(audio_file: BinaryIO, tmp_dir: str) -> List[mp3_splitter.Chunk]:
+    """Decode the MP3 and export 20-minute chunk files. CPU-bound — run in a thread."""
+    # Let ffmpeg read the file in place when it is on disk; pydub spools anything else
+    path = _file_path(audio_file)
+    if path:
+        audio = AudioSegment.from_mp3(path)
+    else:
+        audio_file.seek(0)
+        audio = AudioSegment.from_file(audio_file, format="mp3")
+    total_duration = len(audio)
+
+    # Split into chunks
+    chunks = []
+    chunk_index = 0
+    start_ms = 0
+    while start_ms < total_duration:
+        end_ms = min(start_ms + CHUNK_DURATION_MS, total_duration)
+        chunk = audio[start_ms:end_ms]
+
+        chunk_path = os.path.join(tmp_dir, f"chunk_{chunk_index}.mp3")
+        chunk.export(chunk_path, format="mp3")
+        chunks.append(mp3_splitter.Chunk(chunk_path, start_ms, end_ms))
+
+        start_ms = end_ms
+        chunk_index += 1
+
+    return chunks
+
+
+def _join_chunk_transcripts(transcripts: List[str]) -> str:
+    """
+    Concatenate chunk transcripts, dropping words repeated because the chunks
+    overlap: the longest run (2 to 40 words) that ends one chunk and starts the next.
+    """
+    def normalise(word):
+        return re.sub(r"[^\w']", "", word.lower())
+
+    joined = []
+    for text in transcripts:
+        words = text.split()
+        if joined and words:
+            tail = [normalise(w) for w in joined[-1].split()[-40:]]
+            head = [normalise(w) for w in words[:40]]
+            for size in range(min(len(tail), len(head)), 1, -1):
+                if tail[-size:] == head[:size]:
+                    text = " ".join(words[size:])
+                    break
+        joined.append(text)
+    return "\n\n".join(t for t in joined if t)
+
+
+async def _transcribe_chunk(client: AsyncAzureOpenAI, chunk_path: str, index: int, total: int,
+                            semaphore: asyncio.Semaphore) -> str:
+    """Transcribe one chunk file, retrying it on its own with backoff."""
+    async with semaphore:
+        for attempt in range(1, TRANSCRIBE_CHUNK_RETRIES + 1):
+            started = time.monotonic()
+            try:
+                with open(chunk_path, "rb") as f:
+                    response = await client.audio.transcriptions.create(
+                        model=AZURE_OPENAI_DEPLOYMENT,
+                        file=f,
+                        language="en",
+                    )
+                logger.info(f"Chunk {index+1}/{total} transcribed in {time.monotonic() - started:.1f}s")
+                return response.text
+            except Exception as e:
+                if attempt == TRANSCRIBE_CHUNK_RETRIES:
+                    raise
+                wait = 2 ** attempt
+                logger.warning(f"Chunk {index+1}/{total} failed after {time.monotonic() - started:.1f}s "
+                               f"(attempt {attempt}/{TRANSCRIBE_CHUNK_RETRIES}): {e} — retrying in {wait}s")
+                await asyncio.sleep(wait)
+
+
+async def _transcribe_chunked(client: AsyncAzureOpenAI, chunks: List[mp3_splitter.Chunk]) -> str:
+    """Transcribe chunk files concurrently and concatenate them in order."""
+    # Each chunk retries on its own (_transcribe_chunk), so no SDK retries on top
+    client = client.with_options(max_retries=0)
+    # At most TRANSCRIBE_CHUNK_CONCURRENCY in flight; gather returns results in chunk order
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(TRANSCRIBE_CHUNK_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_transcribe_chunk(client, chunk.path, i, len(chunks), semaphore))
+        for i, chunk in enumerate(chunks)
+    ]
+    try:
+        transcripts = await asyncio.gather(*tasks)
+    except BaseException:
+        # A chunk gave up (or we were cancelled): stop the other uploads before
+        # the caller deletes the chunk files out from under them
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    logger.info(f"Transcribed {len(chunks)} chunks in {time.monotonic() - started:.1f}s")
+
+    return _join_chunk_transcripts(transcripts)
@@ -0,0 +1,176 @@
+"""
+Call Artifact Store
+Keeps what each pipeline stage produced for a call — call metadata,
+transcript, rendered prompt, Gemini notes and the adaptive card (stored with
+the prompt version and route that produced it) — as files on local disk,
+with a small SQLite index by call_id and call date.
+
+Unlike the job store's checkpoints (which reset when a failed job is
+resubmitted), artifacts outlive the job, so /retry picks a call up at its
+first missing artifact instead of re-fetching, re-downloading and
+re-transcribing it. Artifacts older than ARTIFACT_RETENTION_DAYS are purged
+by the server's background janitor (main.run_janitor).
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", os.path.join(DATA_DIR, "artifacts"))
+ARTIFACT_RETENTION_DAYS = int(os.environ.get("ARTIFACT_RETENTION_DAYS", "30"))
+
+# Artifacts in pipeline order, and the file each is stored in
+ARTIFACTS = {
+    "call_meta": "call_meta.json",
+    "transcript": "transcript.txt",
+    "prompt": "prompt.txt",
+    "notes": "notes.txt",
+    "card": "card.json",
+}
+
+_conn = None
+_lock = threading.Lock()
+_stats = {"saved": 0, "loaded": 0, "purged_calls": 0}
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Open the artifact index (once per process)."""
+    global _conn
+    if _conn is None:
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(ARTIFACTS_DIR, "index.sqlite3"), check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "call_id TEXT PRIMARY KEY, call_date TEXT, names TEXT NOT NULL DEFAULT '[]', "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS artifacts_call_date ON artifacts (call_date)")
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _call_dir(call_id: str) -> str:
+    return os.path.join(ARTIFACTS_DIR, call_id)
+
+
+def save(call_id: str, name: str, content: Any, call_date: str = None):
+    """Store one artifact (str for .txt, JSON-serialisable for .json) atomically."""
+    filename = ARTIFACTS[name]
+    os.makedirs(_call_dir(call_id), exist_ok=True)
+    path = os.path.join(_call_dir(call_id), filename)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        if filename.endswith(".json"):
+            json.dump(content, f)
+        else:
+            f.write(content)
+    os.replace(path + ".part", path)
+
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT names FROM artifacts WHERE call_id = ?", (call_id,)).fetchone()
+        names = set(json.loads(row[0])) if row else set()
+        names.add(name)
+        names = json.dumps([n for n in ARTIFACTS if n in names])
+        if row:
+            conn.execute(
+                "UPDATE artifacts SET names = ?, call_date = COALESCE(?, call_date), updated_at = ? WHERE call_id = ?",
+                (names, call_date, now, call_id),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO artifacts (call_id, call_date, names, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (call_id, call_date, names, now, now),
+            )
+        conn.commit()
+        _stats["saved"] += 1
+
+
+def load(call_id: str, name: str) -> Optional[Any]:
+    """Return a stored artifact, or None if it doesn't exist."""
+    filename = ARTIFACTS[name]
+    path = os.path.join(_call_dir(call_id), filename)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = json.load(f) if filename.endswith(".json") else f.read()
+    except FileNotFoundError:
+        return None
+    _stats["loaded"] += 1
+    return content
+
+
+def delete(call_id: str, *names_to_delete: str):
+    """Remove some of a call's artifacts (e.g. so a forced retry regenerates them)."""
+    for name in names_to_delete:
+        try:
+            os.remove(os.path.join(_call_dir(call_id), ARTIFACTS[name]))
+        except FileNotFoundError:
+            pass
+
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT names FROM artifacts WHERE call_id = ?", (call_id,)).fetchone()
+        if row:
+            kept = [n for n in json.loads(row[0]) if n not in names_to_delete]
+            conn.execute("UPDATE artifacts SET names = ?, updated_at = ? WHERE call_id = ?",
+                         (json.dumps(kept), time.time(), call_id))
+            conn.commit()
+
+
+def names(call_id: str) -> List[str]:
+    """Artifacts stored for a call, in pipeline order."""
+    with _lock:
+        row = _get_conn().execute("SELECT names FROM artifacts WHERE call_id = ?", (call_id,)).fetchone()
+    return json.loads(row[0]) if row else []
+
+
+def first_missing(call_id: str) -> Optional[str]:
+    """The first artifact in pipeline order not yet stored for a call (None if all are)."""
+    stored = set(names(call_id))
+    for name in ARTIFACTS:
+        if name not in stored:
+            return name
+    return None
+
+
+def calls_on(call_date: str) -> List[str]:
+    """call_ids with artifacts for a given call date (YYYY-MM-DD)."""
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT call_id FROM artifacts WHERE call_date = ? ORDER BY created_at", (call_date,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def purge_expired() -> int:
+    """Delete artifacts last updated more than ARTIFACT_RETENTION_DAYS ago. Returns calls purged."""
+    cutoff = time.time() - ARTIFACT_RETENTION_DAYS * 86400
+    with _lock:
+        conn = _get_conn()
+        call_ids = [row[0] for row in conn.execute("SELECT call_id FROM artifacts WHERE updated_at < ?", (cutoff,))]
+        conn.executemany("DELETE FROM artifacts WHERE call_id = ?", [(call_id,) for call_id in call_ids])
+        conn.commit()
+        _stats["purged_calls"] += len(call_ids)
+    # Files go after the lock is released, so saves and stats() don't wait on a large purge
+    for call_id in call_ids:
+        shutil.rmtree(_call_dir(call_id), ignore_errors=True)
+    if call_ids:
+        logger.info(f"Purged artifacts for {len(call_ids)} calls older than {ARTIFACT_RETENTION_DAYS} days")
+    return len(call_ids)
+
+
+def stats() -> Dict[str, Any]:
+    """Stored calls and save/load/purge counters (for /health)."""
+    with _lock:
+        calls = _get_conn().execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+    return dict(_stats, calls=calls, retention_days=ARTIFACT_RETENTION_DAYS)
@@ -0,0 +1,160 @@
+"""
+Audio Preparation
+Local analysis of recordings before they are uploaded for transcription.
+
+detect_silences runs ffmpeg's silencedetect filter over the recording (ffmpeg
+is already required by pydub). It streams the file and keeps nothing but the
+silence timestamps. Recordings that need chunking use them so chunk
+boundaries land in pauses instead of mid-sentence. With SILENCE_TRIM_ENABLED
+(opt-in: a quiet speaker on a poor line can fall under the threshold), long
+silences such as hold music and ringing gaps are also cut out by mp3_splitter
+before upload.
+
+normalize (optional, AUDIO_NORMALIZE_ENABLED) re-encodes a recording to mono
+16 kHz low-bitrate MP3 before upload, so far fewer calls exceed the 24MB
+upload limit. It stays MP3 so mp3_splitter can still cut it without decoding.
+Conversions run as ffmpeg subprocesses, at most AUDIO_NORMALIZE_CONCURRENCY
+at a time.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SILENCE_TRIM_ENABLED = os.environ.get("SILENCE_TRIM_ENABLED", "false").lower() == "true"
+SILENCE_NOISE_DB = os.environ.get("SILENCE_NOISE_DB", "-35")  # quieter than this counts as silence
+SILENCE_DETECT_MIN_MS = int(os.environ.get("SILENCE_DETECT_MIN_MS", "700"))  # shortest pause worth cutting a chunk in
+SILENCE_TRIM_MIN_MS = int(os.environ.get("SILENCE_TRIM_MIN_MS", "3000"))  # silences longer than this are trimmed
+SILENCE_KEEP_MS = int(os.environ.get("SILENCE_KEEP_MS", "500"))  # quiet kept either side of a trim
+SILENCE_DETECT_TIMEOUT_SECONDS = int(os.environ.get("SILENCE_DETECT_TIMEOUT_SECONDS", "120"))
+
+AUDIO_NORMALIZE_ENABLED = os.environ.get("AUDIO_NORMALIZE_ENABLED", "false").lower() == "true"
+AUDIO_NORMALIZE_SAMPLE_RATE = int(os.environ.get("AUDIO_NORMALIZE_SAMPLE_RATE", "16000"))
+AUDIO_NORMALIZE_BITRATE = os.environ.get("AUDIO_NORMALIZE_BITRATE", "32k")
+AUDIO_NORMALIZE_CONCURRENCY = int(os.environ.get("AUDIO_NORMALIZE_CONCURRENCY", "2"))
+AUDIO_NORMALIZE_TIMEOUT_SECONDS = int(os.environ.get("AUDIO_NORMALIZE_TIMEOUT_SECONDS", "300"))
+
+_normalize_slots = None  # asyncio.Semaphore, created on the running loop
+_stats = {"normalized": 0, "normalize_failures": 0, "bytes_in": 0, "bytes_out": 0, "normalize_seconds": 0.0}
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: ([\d.]+)")
+
+
+async def detect_silences(path: str) -> List[Tuple[float, float]]:
+    """
+    Return (start_ms, end_ms) silences in the recording, sorted. Returns an
+    empty list (no trimming) if ffmpeg is unavailable or fails.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_DETECT_MIN_MS / 1000}",
+            "-f", "null", "-",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        logger.warning(f"Silence detection unavailable ({e}) — uploading audio untrimmed")
+        return []
+
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), SILENCE_DETECT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.warning("Silence detection timed out — uploading audio untrimmed")
+        return []
+
+    if process.returncode != 0:
+        logger.warning(f"Silence detection failed (ffmpeg exit {process.returncode}) — uploading audio untrimmed")
+        return []
+
+    silences = []
+    start = None
+    for line in stderr.decode("utf-8", "replace").splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1))) * 1000
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1)) * 1000))
+            start = None
+    # A silence still open at the end of the file runs to the end
+    if start is not None:
+        silences.append((start, float("inf")))
+    return silences
+
+
+async def normalize(path: str, out_path: str) -> bool:
+    """
+    Downmix to mono, resample and re-encode path into out_path. Returns False
+    (use the original) if ffmpeg fails or the result isn't smaller.
+    """
+    global _normalize_slots
+    if _normalize_slots is None:
+        _normalize_slots = asyncio.Semaphore(AUDIO_NORMALIZE_CONCURRENCY)
+
+    async with _normalize_slots:
+        started = time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-y", "-hide_banner", "-nostats", "-loglevel", "error", "-i", path,
+                "-vn", "-ac", "1", "-ar", str(AUDIO_NORMALIZE_SAMPLE_RATE),
+                "-c:a", "libmp3lame", "-b:a", AUDIO_NORMALIZE_BITRATE, out_path,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await asyncio.wait_for(process.communicate(), AUDIO_NORMALIZE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            _stats["normalize_failures"] += 1
+            logger.warning("Audio normalization timed out — uploading original")
+            return False
+        except OSError as e:
+            _stats["normalize_failures"] += 1
+            logger.warning(f"Audio normalization unavailable ({e}) — uploading original")
+            return False
+        elapsed = time.monotonic() - started
+
+    if process.returncode != 0:
+        _stats["normalize_failures"] += 1
+        logger.warning(f"Audio normalization failed: {stderr.decode('utf-8', 'replace').strip()[-300:]}")
+        return False
+
+    size_in, size_out = os.path.getsize(path), os.path.getsize(out_path)
+    if size_out >= size_in:
+        logger.info(f"Normalized audio is not smaller ({size_out} >= {size_in} bytes) — uploading original")
+        return False
+
+    _stats["normalized"] += 1
+    _stats["bytes_in"] += size_in
+    _stats["bytes_out"] += size_out
+    _stats["normalize_seconds"] += elapsed
+    logger.info(f"Normalized audio {size_in / (1024 * 1024):.1f} MB -> {size_out / (1024 * 1024):.1f} MB in {elapsed:.1f}s")
+    return True
+
+
+def settings_fingerprint() -> str:
+    """Settings that change the audio sent for transcription (part of transcript cache keys)."""
+    parts = []
+    if AUDIO_NORMALIZE_ENABLED:
+        parts.append(f"norm{AUDIO_NORMALIZE_SAMPLE_RATE}-{AUDIO_NORMALIZE_BITRATE}")
+    if SILENCE_TRIM_ENABLED:
+        parts.append(f"trim{SILENCE_NOISE_DB}-{SILENCE_DETECT_MIN_MS}-{SILENCE_TRIM_MIN_MS}-{SILENCE_KEEP_MS}")
+    return "+".join(parts) or "raw"
+
+
+def stats() -> Dict[str, Any]:
+    """Normalization counters (for /health)."""
+    return dict(_stats, normalize_enabled=AUDIO_NORMALIZE_ENABLED,
+                normalize_seconds=round(_stats["normalize_seconds"], 1),
+                silence_trim_enabled=SILENCE_TRIM_ENABLED)
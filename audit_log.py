@@ -0,0 +1,132 @@
+"""
+Audit Log Writer
+Buffered write-behind for the Skipped_Calls and Processing_Errors sheets.
+
+Rows are queued in memory and a background thread appends them in batches
+(one values().append per sheet) when AUDIT_LOG_BATCH_SIZE rows are waiting or
+AUDIT_LOG_FLUSH_SECONDS have passed. If Sheets is down the batch spills to a
+local JSONL file and is replayed ahead of the next successful flush. The
+queue is flushed on shutdown.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, List
+
+import sheets_client
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+GOOGLE_SPREADSHEET_ID = os.environ.get("GOOGLE_SPREADSHEET_ID", "1Z_5rhbhe4lW13t4DKOzhWW-cKLbeyneUHTZXBUmBM-g")
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+AUDIT_LOG_SPILL_PATH = os.environ.get("AUDIT_LOG_SPILL_PATH", os.path.join(DATA_DIR, "audit_log_spill.jsonl"))
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("AUDIT_LOG_BATCH_SIZE", "20"))
+AUDIT_LOG_FLUSH_SECONDS = float(os.environ.get("AUDIT_LOG_FLUSH_SECONDS", "10"))
+
+_pending = deque()  # (range, row)
+_cond = threading.Condition()
+_flush_lock = threading.Lock()
+_thread = None
+_stats = {"queued": 0, "written": 0, "api_calls": 0, "spilled": 0, "flush_failures": 0}
+
+
+def enqueue(sheet_range: str, row: list):
+    """Queue a row for the given append range (e.g. 'Skipped_Calls!A:E'). Never blocks on Sheets."""
+    global _thread
+    with _cond:
+        _pending.append((sheet_range, row))
+        _stats["queued"] += 1
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="audit-log-flusher", daemon=True)
+            _thread.start()
+        if len(_pending) >= AUDIT_LOG_BATCH_SIZE:
+            _cond.notify()
+
+
+def _run():
+    """Flusher loop: wake on batch size or timer."""
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: len(_pending) >= AUDIT_LOG_BATCH_SIZE, timeout=AUDIT_LOG_FLUSH_SECONDS)
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Audit log flush error: {e}")
+
+
+def _read_spill() -> List[tuple]:
+    if not os.path.exists(AUDIT_LOG_SPILL_PATH):
+        return []
+    rows = []
+    with open(AUDIT_LOG_SPILL_PATH, "r") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                rows.append((entry["range"], entry["row"]))
+    return rows
+
+
+def _spill(rows: List[tuple]):
+    os.makedirs(os.path.dirname(AUDIT_LOG_SPILL_PATH) or ".", exist_ok=True)
+    with open(AUDIT_LOG_SPILL_PATH, "a") as f:
+        for sheet_range, row in rows:
+            f.write(json.dumps({"range": sheet_range, "row": row}) + "\n")
+
+
+def flush():
+    """Write everything queued (plus any spilled rows) to Sheets, one append per sheet."""
+    with _flush_lock:
+        with _cond:
+            batch = list(_pending)
+            _pending.clear()
+
+        spilled = _read_spill()
+        rows = spilled + batch
+        if not rows:
+            return
+
+        by_range = {}
+        for sheet_range, row in rows:
+            by_range.setdefault(sheet_range, []).append(row)
+
+        written = []
+        try:
+            sheets_service = sheets_client.get_sheets_service()
+            for sheet_range, values in by_range.items():
+                sheets_service.spreadsheets().values().append(
+                    spreadsheetId=GOOGLE_SPREADSHEET_ID,
+                    range=sheet_range,
+                    valueInputOption='RAW',
+                    body={'values': values}
+                ).execute()
+                _stats["api_calls"] += 1
+                written.append(sheet_range)
+        except Exception as e:
+            _stats["flush_failures"] += 1
+            # Keep only what didn't make it, in order
+            unwritten = [(r, row) for r, row in rows if r not in written]
+            _stats["spilled"] += sum(1 for r, _ in batch if r not in written)
+            logger.warning(f"Audit log flush failed, {len(unwritten)} rows held in {AUDIT_LOG_SPILL_PATH}: {e}")
+            if spilled:
+                os.remove(AUDIT_LOG_SPILL_PATH)
+            _spill(unwritten)
+            return
+
+        if spilled:
+            os.remove(AUDIT_LOG_SPILL_PATH)
+            logger.info(f"Replayed {len(spilled)} spilled audit log rows")
+        _stats["written"] += len(rows)
+
+
+def stats() -> Dict[str, Any]:
+    """Queue depth and write counters (for /health)."""
+    with _cond:
+        return dict(_stats, pending=len(_pending))
+
+
+atexit.register(flush)
@@ -13,27 +13,56 @@ import os
 import re
 import json
 import time
+import bisect
+import hashlib
+import asyncio
 import logging
-import base64
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List, Union, NamedTuple, Callable, Awaitable
 
-import requests
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import aiohttp
 import io
+from googleapiclient.errors import HttpError
+
+import artifact_store
+import audit_log
+import http_clients
+import model_router
+import retry_policy
+import sheets_client
+import transcript_compaction
+from disk_cache import DiskCache
 
 # ============================================================================
 # CONFIGURATION (from environment variables, with fallback to defaults)
 # ============================================================================
 
-# Google
-GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE", "meraki-n8n-automation-66a9d5aafc1e.json")
-GOOGLE_SERVICE_ACCOUNT_JSON = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")  # For Railway: paste full JSON
+# Google (service account credentials are read in sheets_client)
 GOOGLE_SPREADSHEET_ID = os.environ.get("GOOGLE_SPREADSHEET_ID", "1Z_5rhbhe4lW13t4DKOzhWW-cKLbeyneUHTZXBUmBM-g")
 
 # Gemini API (Google AI Studio)
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_SYSTEM_INSTRUCTION = "You are a recruitment call analyst for Meraki Talent, a UK-based financial services recruitment agency. Extract candidate information according to the provided template. Only include information explicitly stated by the candidate about themselves. Recruiter statements must be ignored. If information is not explicitly stated, write 'Not stated'. Do not infer or guess."
+
+# Streaming: post the card as soon as notes start arriving and update it in place
+GEMINI_STREAMING_ENABLED = os.environ.get("GEMINI_STREAMING_ENABLED", "true").lower() == "true"
+GEMINI_STREAM_UPDATE_SECONDS = float(os.environ.get("GEMINI_STREAM_UPDATE_SECONDS", "3"))
+GEMINI_STREAM_FIRST_POST_CHARS = int(os.environ.get("GEMINI_STREAM_FIRST_POST_CHARS", "200"))
+
+# Gemini retries: jittered exponential backoff; the breaker opens after this many
+# consecutive retryable failures and lets a probe through after the reset period
+GEMINI_RETRY_BASE_SECONDS = float(os.environ.get("GEMINI_RETRY_BASE_SECONDS", "2"))
+GEMINI_RETRY_MAX_SECONDS = float(os.environ.get("GEMINI_RETRY_MAX_SECONDS", "30"))
+GEMINI_BREAKER_FAILURES = int(os.environ.get("GEMINI_BREAKER_FAILURES", "5"))
+GEMINI_BREAKER_RESET_SECONDS = float(os.environ.get("GEMINI_BREAKER_RESET_SECONDS", "60"))
+
+# Gemini extraction cache (reprocessing the same transcript through the same prompt is free).
+# Cached notes are call content, so they expire with the stored artifacts (ARTIFACT_RETENTION_DAYS).
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+GEMINI_CACHE_PATH = os.environ.get("GEMINI_CACHE_PATH", os.path.join(DATA_DIR, "gemini_cache.sqlite3"))
+GEMINI_CACHE_MAX_MB = int(os.environ.get("GEMINI_CACHE_MAX_MB", "50"))
+GEMINI_CACHE_TTL_SECONDS = artifact_store.ARTIFACT_RETENTION_DAYS * 86400
 
 # Microsoft Graph (Delegated OAuth2)
 MS_TENANT_ID = os.environ.get("MS_TENANT_ID", "")
@@ -53,41 +82,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Awaited with the notes text streamed so far
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+_gemini_cache = DiskCache("Gemini cache", GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_MB * 1024 * 1024, GEMINI_CACHE_TTL_SECONDS)
+_gemini_breaker = retry_policy.CircuitBreaker("Gemini", GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET_SECONDS)
+
 # ============================================================================
 # GOOGLE SERVICES
 # ============================================================================
 
 def get_google_services():
-    """Initialize Google Sheets service. Drive service no longer needed."""
-    scopes = [
-        'https://www.googleapis.com/auth/spreadsheets'
-    ]
-
-    # Use JSON from environment variable (Railway) or file (local)
-    if GOOGLE_SERVICE_ACCOUNT_JSON:
-        json_str = GOOGLE_SERVICE_ACCOUNT_JSON
-
-        # Try base64 decode first (for Railway)
-        try:
-            json_str = base64.b64decode(json_str).decode('utf-8')
-            logger.info("Decoded base64 service account JSON")
-        except Exception:
-            # Not base64, use as-is
-            pass
-
-        service_account_info = json.loads(json_str)
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info,
-            scopes=scopes
-        )
-    else:
-        credentials = service_account.Credentials.from_service_account_file(
-            GOOGLE_SERVICE_ACCOUNT_FILE,
-            scopes=scopes
-        )
-
-    sheets_service = build('sheets', 'v4', credentials=credentials)
-    return sheets_service
+    """Return the shared Google Sheets service. Drive service no longer needed."""
+    return sheets_client.get_sheets_service()
 
 
 def get_consultants(sheets_service) -> Dict[str, Dict]:
@@ -123,39 +130,146 @@ def get_consultants(sheets_service) -> Dict[str, Dict]:
     return consultants
 
 
-def find_consultant_by_aircall_id(aircall_user_id: str, consultants: Dict[str, Dict]) -> Tuple[Optional[Dict], str]:
+class _SubstringMatcher:
+    """
+    Aho-Corasick automaton over a ranked list of patterns.
+    best_rank(text) returns the lowest rank of any pattern occurring in text, in one pass.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [len(patterns)]  # len(patterns) means "no match"
+        self._none = len(patterns)
+
+        for rank, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(self._none)
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._best[node] = min(self._best[node], rank)
+
+        # Breadth-first: failure links, and fold each suffix's best match into the node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._best[nxt] = min(self._best[nxt], self._best[self._fail[nxt]])
+
+    def best_rank(self, text: str) -> int:
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        result = best[0]
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best[node] < result:
+                result = best[node]
+        return result
+
+
+class ConsultantIndex:
+    """
+    Lookup structures built once per consultant directory load.
+
+    - aircall_id -> consultant hash map
+    - name matcher: consultant names ranked longest-first (ties in sheet order),
+      so "longest name wins" lookups are a single pass over the query
+    """
+
+    def __init__(self, consultants: Dict[str, Dict]):
+        self.consultants = consultants
+
+        self._by_aircall_id = {}
+        for consultant_data in consultants.values():
+            aircall_id = consultant_data.get('AircallUserId')
+            if aircall_id:
+                self._by_aircall_id.setdefault(aircall_id, consultant_data)
+
+        # Same order the old linear scans used: longest name first, stable for ties
+        self._ranked = sorted(consultants.items(), key=lambda x: len(x[0]), reverse=True)
+        keys = [name_key for name_key, _ in self._ranked]
+        self._matcher = _SubstringMatcher(keys)
+
+        # All names joined in rank order: the first hit of str.find is the
+        # best-ranked name containing the query
+        self._haystack = '\x00'.join(keys)
+        self._offsets = []
+        offset = 0
+        for name_key in keys:
+            self._offsets.append(offset)
+            offset += len(name_key) + 1
+
+    def __len__(self) -> int:
+        return len(self.consultants)
+
+    def _result(self, rank: int) -> Tuple[Optional[Dict], str]:
+        if rank >= len(self._ranked):
+            return None, ''
+        consultant_data = self._ranked[rank][1]
+        return consultant_data, consultant_data['Name']
+
+    def by_aircall_id(self, aircall_user_id: str) -> Tuple[Optional[Dict], str]:
+        consultant_data = self._by_aircall_id.get(aircall_user_id)
+        if consultant_data is None:
+            return None, ''
+        return consultant_data, consultant_data['Name']
+
+    def in_text(self, text: str) -> Tuple[Optional[Dict], str]:
+        """Longest consultant name occurring in text (lowercased)."""
+        return self._result(self._matcher.best_rank(text))
+
+    def by_name(self, name_lower: str) -> Tuple[Optional[Dict], str]:
+        """Longest consultant name that occurs in, or contains, name_lower."""
+        rank = self._matcher.best_rank(name_lower)
+
+        if '\x00' not in name_lower:
+            pos = self._haystack.find(name_lower)
+            if pos != -1:
+                rank = min(rank, bisect.bisect_right(self._offsets, pos) - 1)
+
+        return self._result(rank)
+
+
+def _as_index(consultants: Union[Dict[str, Dict], ConsultantIndex]) -> ConsultantIndex:
+    return consultants if isinstance(consultants, ConsultantIndex) else ConsultantIndex(consultants)
+
+
+def find_consultant_by_aircall_id(aircall_user_id: str, consultants: Union[Dict[str, Dict], ConsultantIndex]) -> Tuple[Optional[Dict], str]:
     """
     Find consultant by Aircall user ID.
     Returns (consultant_dict, consultant_name) or (None, '') if not found.
+    Pass a prebuilt ConsultantIndex for O(1) lookups.
     """
     if not aircall_user_id:
         return None, ''
 
-    for name_key, consultant_data in consultants.items():
-        if consultant_data.get('AircallUserId') == aircall_user_id:
-            return consultant_data, consultant_data['Name']
-
-    return None, ''
+    return _as_index(consultants).by_aircall_id(aircall_user_id)
 
 
-def find_consultant_by_name(name: str, consultants: Dict[str, Dict]) -> Tuple[Optional[Dict], str]:
+def find_consultant_by_name(name: str, consultants: Union[Dict[str, Dict], ConsultantIndex]) -> Tuple[Optional[Dict], str]:
     """
-    Find consultant by name (case-insensitive contains match).
+    Find consultant by name (case-insensitive contains match, longer names first).
     Returns (consultant_dict, consultant_name) or (None, '') if not found.
+    Pass a prebuilt ConsultantIndex for lookups linear in the length of name.
     """
     if not name:
         return None, ''
 
-    name_lower = name.lower()
-
-    # Sort by name length descending to match longer names first
-    sorted_consultants = sorted(consultants.items(), key=lambda x: len(x[0]), reverse=True)
-
-    for name_key, consultant_data in sorted_consultants:
-        if name_key in name_lower or name_lower in name_key:
-            return consultant_data, consultant_data['Name']
-
-    return None, ''
+    return _as_index(consultants).by_name(name.lower())
 
 
 def get_prompts(sheets_service) -> Dict[str, str]:
@@ -179,39 +293,122 @@ def get_prompts(sheets_service) -> Dict[str, str]:
     return prompts
 
 
+def get_routing_rules(sheets_service) -> List[List[str]]:
+    """Load model routing rows from the Model_Routing tab (empty if the tab doesn't exist)."""
+    try:
+        result = sheets_service.spreadsheets().values().get(
+            spreadsheetId=GOOGLE_SPREADSHEET_ID,
+            range='Model_Routing!A:H'
+        ).execute()
+    except HttpError as e:
+        if e.resp.status == 400:  # "Unable to parse range" — no routing tab, use built-in rules
+            return []
+        raise
+    return result.get('values', [])
+
+
+DEFAULT_PROMPT_TEMPLATE = 'Please summarize this call transcript:\n\n{{transcript_text}}'
+
+_PLACEHOLDER_RE = re.compile(r'\{\{(transcript_text|recruiter_names|candidate_names)\}\}')
+
+
+class RenderedPrompt(NamedTuple):
+    text: str
+    version: str  # content hash of the template it was rendered from
+
+
+class PromptTemplate:
+    """
+    A desk prompt precompiled into literal segments and placeholder slots,
+    so rendering is one join (the transcript is copied once, not once per replace).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+        # re.split with a capture group: even indices are literals, odd are placeholder names
+        self._parts = _PLACEHOLDER_RE.split(text)
+
+    def render(self, transcript_text: str, recruiter_names: str = '', candidate_names: str = '') -> RenderedPrompt:
+        values = {
+            'transcript_text': transcript_text,
+            'recruiter_names': recruiter_names,
+            'candidate_names': candidate_names,
+        }
+        parts = self._parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return RenderedPrompt(''.join(parts), self.version)
+
+
+class PromptSet:
+    """
+    Compiled desk prompts and model routing rules from one read of the Prompts
+    and Model_Routing tabs, with a version for change detection.
+    """
+
+    def __init__(self, prompts: Dict[str, str], routing_rows: Optional[List[List[str]]] = None):
+        self.version = prompts_version(prompts, routing_rows)
+        self.router = model_router.ModelRouter(routing_rows)
+        self.templates = {desk: PromptTemplate(text) for desk, text in prompts.items() if text}
+        self._fallback = self.templates.get('Default') or PromptTemplate(DEFAULT_PROMPT_TEMPLATE)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def for_desk(self, desk: str) -> PromptTemplate:
+        """Desk prompt, falling back to the Default row (or the built-in summary prompt)."""
+        return self.templates.get(desk) or self._fallback
+
+    def is_current(self, desk: str, word_count: int, prompt_version: Optional[str],
+                   route: Optional[Dict[str, Any]]) -> bool:
+        """Whether a note made with prompt_version and route is what this PromptSet would produce now."""
+        if not route or prompt_version != self.for_desk(desk).version:
+            return False
+        current = self.router.route(desk, word_count)
+        return (route.get('name'), route.get('model'), route.get('max_output_tokens'), route.get('temperature')) == \
+            (current.name, current.model, current.max_output_tokens, current.temperature)
+
+
+def prompts_version(prompts: Dict[str, str], routing_rows: Optional[List[List[str]]] = None) -> str:
+    """Content hash of a whole Prompts sheet read (and the Model_Routing rows)."""
+    digest = hashlib.sha256()
+    for desk in sorted(prompts):
+        digest.update(desk.encode('utf-8') + b'\x00' + prompts[desk].encode('utf-8') + b'\x00')
+    if routing_rows:
+        digest.update(json.dumps(routing_rows).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
 def log_skipped_call(sheets_service, source: str, word_count: int, reason: str, consultant_name: str = ''):
-    """Log skipped call to Google Sheets."""
-    values = [[
+    """
+    Log skipped call to Google Sheets.
+    Queued for the batched audit log writer — returns immediately; sheets_service is
+    kept for existing callers but no longer used.
+    """
+    audit_log.enqueue('Skipped_Calls!A:E', [
         source,
         datetime.now().isoformat(),
         word_count,
         reason,
         consultant_name
-    ]]
-    sheets_service.spreadsheets().values().append(
-        spreadsheetId=GOOGLE_SPREADSHEET_ID,
-        range='Skipped_Calls!A:E',
-        valueInputOption='RAW',
-        body={'values': values}
-    ).execute()
+    ])
     logger.info(f"Logged skipped call: {source} - {reason}")
 
 
 def log_processing_error(sheets_service, source: str, error_message: str, node_name: str):
-    """Log processing error to Google Sheets."""
-    values = [[
+    """
+    Log processing error to Google Sheets.
+    Queued for the batched audit log writer — returns immediately; sheets_service is
+    kept for existing callers but no longer used.
+    """
+    audit_log.enqueue('Processing_Errors!A:E', [
         source,
         datetime.now().isoformat(),
         error_message,
         node_name,
         'FALSE'
-    ]]
-    sheets_service.spreadsheets().values().append(
-        spreadsheetId=GOOGLE_SPREADSHEET_ID,
-        range='Processing_Errors!A:E',
-        valueInputOption='RAW',
-        body={'values': values}
-    ).execute()
+    ])
     logger.error(f"Logged error: {source} - {error_message}")
 
 
@@ -224,17 +421,113 @@ def count_words(text: str) -> int:
 # GEMINI API (Google AI Studio)
 # ============================================================================
 
-def call_gemini(prompt_template: str, transcript: str, consultant_name: str = '', candidate_name: str = '', max_retries: int = 3) -> str:
-    """Call Gemini 2.5 Pro to extract call notes with retry logic."""
+class GeminiAPIError(Exception):
+    """Error status from the Gemini API, with the server's retry hint if it gave one."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Gemini API error {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class GeminiBlockedError(retry_policy.PermanentError):
+    """Gemini refused the prompt or response (safety filter) — retrying won't help."""
+
+
+async def _raise_for_gemini_status(response: aiohttp.ClientResponse):
+    """Raise GeminiAPIError for an error response, reading Retry-After or the body's RetryInfo."""
+    if response.status < 400:
+        return
+    body = await response.text()
+    message = body[:300]
+    retry_after = retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+    try:
+        error = json.loads(body).get('error', {})
+        message = error.get('message', message)
+        for detail in error.get('details', []):
+            # google.rpc.RetryInfo, e.g. {"retryDelay": "17s"}
+            delay = detail.get('retryDelay')
+            if retry_after is None and isinstance(delay, str) and delay.endswith('s'):
+                retry_after = float(delay[:-1])
+    except (ValueError, AttributeError):
+        pass
+    raise GeminiAPIError(response.status, message, retry_after)
+
+
+def _check_gemini_chunk(data: dict, require_text: bool = True) -> str:
+    """Validate a generateContent response (or one streamed chunk) and return its text."""
+    # Check for blocked content or missing response
+    if 'candidates' not in data or not data['candidates']:
+        block_reason = data.get('promptFeedback', {}).get('blockReason')
+        if block_reason:
+            raise GeminiBlockedError(f"Prompt blocked by Gemini. Block reason: {block_reason}")
+        raise Exception("No candidates in response")
+
+    candidate = data['candidates'][0]
+
+    # Check finish reason
+    finish_reason = candidate.get('finishReason', '')
+    if finish_reason == 'SAFETY':
+        safety_ratings = candidate.get('safetyRatings', [])
+        raise GeminiBlockedError(f"Content blocked by safety filter: {safety_ratings}")
+
+    # Extract text
+    if 'content' not in candidate or 'parts' not in candidate['content']:
+        if not require_text:
+            return ''
+        raise Exception(f"Unexpected response structure: {candidate}")
+
+    return ''.join(part.get('text', '') for part in candidate['content']['parts'])
+
+
+async def _stream_gemini(session: aiohttp.ClientSession, model: str, body: dict, on_progress: ProgressCallback) -> str:
+    """Call streamGenerateContent (SSE), reporting the text so far to on_progress as it arrives."""
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+    text = ''
+    async with session.post(url, json=body, timeout=aiohttp.ClientTimeout(total=120)) as response:
+        await _raise_for_gemini_status(response)
+        async for line in response.content:
+            line = line.strip()
+            if not line.startswith(b'data:'):
+                continue
+            chunk = _check_gemini_chunk(json.loads(line[5:]), require_text=False)
+            if chunk:
+                text += chunk
+                await on_progress(text)
+
+    if not text:
+        raise Exception("Empty streamed response from Gemini")
+    return text
+
+
+async def call_gemini(prompt_template: Union[str, PromptTemplate, RenderedPrompt], transcript: str = '', consultant_name: str = '', candidate_name: str = '', max_retries: int = 3,
+                      on_progress: Optional[ProgressCallback] = None, route: Optional[model_router.Route] = None,
+                      bypass_cache: bool = False) -> str:
+    """
+    Call Gemini to extract call notes (results are cached, see _gemini_cache;
+    bypass_cache=True always calls Gemini and replaces the cached result).
+    route picks the model and generation settings (default: Pro, see model_router).
+    Retryable failures back off with jitter and feed the shared circuit breaker;
+    raises retry_policy.CircuitOpenError without calling Gemini while it is open.
+    Pass an already rendered prompt to skip rendering. With on_progress (and
+    GEMINI_STREAMING_ENABLED) the response is streamed and on_progress is
+    awaited with the text so far as it arrives.
+    """
 
     # Build the full prompt
-    full_prompt = prompt_template.replace('{{transcript_text}}', transcript)
-    full_prompt = full_prompt.replace('{{recruiter_names}}', consultant_name)
-    full_prompt = full_prompt.replace('{{candidate_names}}', candidate_name)
+    if isinstance(prompt_template, RenderedPrompt):
+        rendered = prompt_template
+    else:
+        if not isinstance(prompt_template, PromptTemplate):
+            prompt_template = PromptTemplate(prompt_template)
+        rendered = prompt_template.render(transcript, consultant_name, candidate_name)
+    full_prompt = rendered.text
+    logger.info(f"Rendered prompt version {rendered.version} ({len(full_prompt)} chars)")
 
-    system_instruction = "You are a recruitment call analyst for Meraki Talent, a UK-based financial services recruitment agency. Extract candidate information according to the provided template. Only include information explicitly stated by the candidate about themselves. Recruiter statements must be ignored. If information is not explicitly stated, write 'Not stated'. Do not infer or guess."
+    system_instruction = GEMINI_SYSTEM_INSTRUCTION
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent?key={GEMINI_API_KEY}"
+    route = route or model_router.DEFAULT_ROUTE
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{route.model}:generateContent?key={GEMINI_API_KEY}"
 
     headers = {
         'Content-Type': 'application/json'
@@ -250,49 +543,86 @@ def call_gemini(prompt_template: str, transcript: str, consultant_name: str = ''
                 "parts": [{"text": full_prompt}]
             }
         ],
-        "generationConfig": {
-            "temperature": 0.1,
-            "maxOutputTokens": 8000
-        }
+        "generationConfig": route.generation_config()
     }
 
-    last_error = None
+    # Same model, instruction, rendered prompt and config -> same extraction. The
+    # rendered prompt includes the desk template, so editing a prompt changes the key.
+    cache_key = hashlib.sha256(json.dumps({
+        "model": route.model,
+        "system_instruction": system_instruction,
+        "prompt_sha256": hashlib.sha256(full_prompt.encode("utf-8")).hexdigest(),
+        "generationConfig": body["generationConfig"],
+    }, sort_keys=True).encode("utf-8")).hexdigest()
+    cached = None if bypass_cache else await asyncio.to_thread(_gemini_cache.get, cache_key)
+    if cached is not None:
+        logger.info(f"Gemini cache hit for prompt version {rendered.version}")
+        return cached
+
+    stream = on_progress is not None and GEMINI_STREAMING_ENABLED
+    session = http_clients.get_session("gemini")
+    started = time.monotonic()
     for attempt in range(max_retries):
+        # Fails fast (CircuitOpenError) while Gemini is known to be down
+        _gemini_breaker.before_call()
         try:
-            response = requests.post(url, headers=headers, json=body, timeout=120)
-            response.raise_for_status()
+            if stream:
+                text = await _stream_gemini(session, route.model, body, on_progress)
+            else:
+                async with session.post(url, headers=headers, json=body, timeout=aiohttp.ClientTimeout(total=120)) as response:
+                    await _raise_for_gemini_status(response)
+                    data = await response.json()
+                text = _check_gemini_chunk(data)
+
+        except Exception as e:
+            decision = retry_policy.classify(e)
+            if not decision.retryable:
+                # Gemini answered (it just rejected this request), so it isn't down
+                _gemini_breaker.record_success()
+                logger.error(f"Gemini API failed (not retryable): {e}")
+                raise
+            _gemini_breaker.record_failure(e, decision.retry_after)
+            if attempt == max_retries - 1:
+                logger.error(f"Gemini API failed after {max_retries} attempts: {e}")
+                raise
+            if decision.retry_after is not None and decision.retry_after > GEMINI_RETRY_MAX_SECONDS:
+                # Don't hold a worker for a long server-requested pause — open the breaker instead
+                _gemini_breaker.trip(decision.retry_after, e)
+                raise retry_policy.CircuitOpenError("Gemini", decision.retry_after) from e
+            wait_time = retry_policy.backoff_seconds(attempt, GEMINI_RETRY_BASE_SECONDS, GEMINI_RETRY_MAX_SECONDS,
+                                                     decision.retry_after)
+            logger.warning(f"Gemini API attempt {attempt + 1} failed: {e}. Retrying in {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+            continue
 
-            data = response.json()
+        _gemini_breaker.record_success()
+        break
 
-            # Check for blocked content or missing response
-            if 'candidates' not in data or not data['candidates']:
-                block_reason = data.get('promptFeedback', {}).get('blockReason', 'Unknown')
-                raise Exception(f"No candidates in response. Block reason: {block_reason}")
+    model_router.record(route, time.monotonic() - started,
+                        transcript_compaction.estimate_tokens(system_instruction + full_prompt),
+                        transcript_compaction.estimate_tokens(text))
+    await asyncio.to_thread(_gemini_cache.put, cache_key, text)
+    return text
 
-            candidate = data['candidates'][0]
 
-            # Check finish reason
-            finish_reason = candidate.get('finishReason', '')
-            if finish_reason == 'SAFETY':
-                safety_ratings = candidate.get('safetyRatings', [])
-                raise Exception(f"Content blocked by safety filter: {safety_ratings}")
+def gemini_cache_stats() -> Dict[str, Any]:
+    """Gemini extraction cache hit rate and size (for /health)."""
+    return _gemini_cache.stats()
 
-            # Extract text
-            if 'content' not in candidate or 'parts' not in candidate['content']:
-                raise Exception(f"Unexpected response structure: {candidate}")
 
-            return candidate['content']['parts'][0]['text']
+def purge_expired_gemini_cache() -> int:
+    """Delete cached Gemini notes older than the retention period. Returns entries purged."""
+    return _gemini_cache.purge_expired()
 
-        except Exception as e:
-            last_error = e
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 5  # 5s, 10s, 15s
-                logger.warning(f"Gemini API attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                logger.error(f"Gemini API failed after {max_retries} attempts: {e}")
 
-    raise last_error
+def gemini_retry_in() -> float:
+    """Seconds until the Gemini circuit breaker lets calls through again (0 if it does now)."""
+    return _gemini_breaker.retry_in()
+
+
+def gemini_breaker_stats() -> Dict[str, Any]:
+    """Gemini circuit breaker state and counters (for /health)."""
+    return _gemini_breaker.stats()
 
 
 # ============================================================================
@@ -342,7 +672,7 @@ class GraphAPIClient:
             'scope': 'Chat.Create ChatMessage.Send ChannelMessage.Send User.Read offline_access'
         }
 
-        response = requests.post(url, data=data)
+        response = http_clients.get_requests_session("graph").post(url, data=data)
         if response.status_code != 200:
             logger.error(f"Token refresh failed: {response.status_code} - {response.text}")
         response.raise_for_status()
@@ -388,7 +718,7 @@ class GraphAPIClient:
             ]
         }
 
-        response = requests.post(url, headers=headers, json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=headers, json=body)
         response.raise_for_status()
 
         return response.json()['id']
@@ -417,7 +747,7 @@ class GraphAPIClient:
             ]
         }
 
-        response = requests.post(url, headers=headers, json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=headers, json=body)
         response.raise_for_status()
 
         logger.info(f"Message sent to chat {chat_id}")
@@ -446,7 +776,7 @@ class GraphAPIClient:
             ]
         }
 
-        response = requests.post(url, headers=headers, json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=headers, json=body)
         response.raise_for_status()
 
         logger.info(f"Message sent to channel {channel_id}")
@@ -492,32 +822,124 @@ def build_adaptive_card(candidate_name: str, call_date: str, notes: str, source:
 # CHRISTINA BOT DELIVERY
 # ============================================================================
 
-def send_via_christina(user_aad_id: str, card: dict, consultant_name: str) -> bool:
-    """Send call notes via Christina bot proactive messaging."""
+# In-process delivery hooks, registered by the bot server on startup.
+# sender: async (user_aad_id, card) -> (success, error_message)
+# updater: async (user_aad_id, card, activity_id or None) -> (success, error_message, activity_id)
+#          posts a new card, or replaces the one already posted as activity_id
+_card_sender = None
+_card_updater = None
+
+
+def register_card_sender(sender, updater=None):
+    """Deliver cards by calling sender directly instead of POSTing to /api/send-note."""
+    global _card_sender, _card_updater
+    _card_sender = sender
+    _card_updater = updater
+
+
+class ProgressiveCard:
+    """
+    A notes card posted to the consultant while Gemini is still writing and
+    then updated in place, at most every GEMINI_STREAM_UPDATE_SECONDS.
+    Only complete lines are shown so half-written words never flash up.
+    If the first post fails (user not registered, Bot Framework down) streaming
+    stops for this call; the finished note is still delivered as usual.
+    """
+
+    def __init__(self, user_aad_id: str, candidate_name: str, call_date: str, source_label: str):
+        self.user_aad_id = user_aad_id
+        self.candidate_name = candidate_name
+        self.call_date = call_date
+        self.source_label = source_label
+        self.activity_id = None
+        self._shown = ''
+        self._last_sent = 0.0
+        self._gave_up = False
+
+    async def update(self, text: str):
+        """on_progress callback for call_gemini."""
+        if self._gave_up:
+            return
+        cut = text.rfind('\n')
+        visible = text[:cut].rstrip() if cut > 0 else ''
+        if not visible or visible == self._shown:
+            return
+        if self.activity_id is None:
+            if len(visible) < GEMINI_STREAM_FIRST_POST_CHARS:
+                return
+        elif time.monotonic() - self._last_sent < GEMINI_STREAM_UPDATE_SECONDS:
+            return
+        if await self._send(visible + "\n\n_Writing notes..._"):
+            self._shown = visible
+        elif self.activity_id is None:
+            self._gave_up = True
+
+    async def abandon(self):
+        """Mark a posted card as interrupted (Gemini failed); the full note follows on retry."""
+        if self.activity_id is not None:
+            await self._send(self._shown + "\n\n_Notes interrupted - the full note will follow._")
+
+    async def _send(self, notes: str) -> bool:
+        card = build_adaptive_card(self.candidate_name, self.call_date, notes, self.source_label)
+        try:
+            success, error, activity_id = await _card_updater(self.user_aad_id, card, self.activity_id)
+        except Exception as e:
+            success, error, activity_id = False, str(e), None
+        self._last_sent = time.monotonic()
+        if not success:
+            logger.warning(f"Progressive card update failed for {self.user_aad_id}: {error}")
+            return False
+        if self.activity_id is None:
+            logger.info(f"Posted progressive card to {self.user_aad_id}")
+        self.activity_id = activity_id or self.activity_id
+        return True
+
+
+async def send_via_christina(user_aad_id: str, card: dict, consultant_name: str) -> bool:
+    """
+    Send call notes via Christina bot proactive messaging.
+    In the bot process the card is handed to the registered sender as-is; the
+    HTTP endpoint is only used when running outside the bot (no sender registered).
+    """
+    if _card_sender is not None:
+        try:
+            success, error = await _card_sender(user_aad_id, card)
+        except Exception as e:
+            logger.error(f"Error sending via Christina: {e}")
+            return False
+
+        if success:
+            logger.info(f"Sent via Christina to {consultant_name} ({user_aad_id})")
+        else:
+            logger.warning(f"Christina delivery failed for {consultant_name}: {error}")
+            if error == "User not registered":
+                logger.warning(f"User may need to message Christina to register")
+        return success
+
     PORT = os.environ.get("PORT", "3978")
     BOT_URL = os.environ.get("BOT_URL", f"http://localhost:{PORT}")
 
     try:
-        response = requests.post(
+        session = http_clients.get_session("bot")
+        async with session.post(
             f"{BOT_URL}/api/send-note",
             json={
                 "user_aad_id": user_aad_id,
                 "card": card
             },
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            logger.info(f"Sent via Christina to {consultant_name} ({user_aad_id})")
-            return True
-        elif response.status_code == 404:
-            error = response.json().get('error', 'Unknown error')
-            logger.warning(f"Christina delivery failed for {consultant_name}: {error}")
-            logger.warning(f"User may need to message Christina to register")
-            return False
-        else:
-            logger.error(f"Christina API error: {response.status_code} - {response.text}")
-            return False
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            if response.status == 200:
+                logger.info(f"Sent via Christina to {consultant_name} ({user_aad_id})")
+                return True
+            elif response.status == 404:
+                error = (await response.json()).get('error', 'Unknown error')
+                logger.warning(f"Christina delivery failed for {consultant_name}: {error}")
+                logger.warning(f"User may need to message Christina to register")
+                return False
+            else:
+                logger.error(f"Christina API error: {response.status} - {await response.text()}")
+                return False
 
     except Exception as e:
         logger.error(f"Error sending via Christina: {e}")
@@ -528,7 +950,7 @@ def send_via_christina(user_aad_id: str, card: dict, consultant_name: str) -> bo
 # MAIN PROCESSOR — Reusable pipeline entry point
 # ============================================================================
 
-def process_transcript(
+async def process_transcript(
     transcript: str,
     consultant: Dict[str, Any],
     consultant_name: str,
@@ -552,51 +974,134 @@ def process_transcript(
         source_label: Label for logging/card (e.g. "Aircall call 12345")
         sheets_service: Google Sheets service instance
     """
+    note = await generate_call_note(
+        transcript, consultant, consultant_name, candidate_name,
+        call_date, source_label, sheets_service,
+    )
+    if note is None:
+        return
+
+    await deliver_call_note(note['card'], consultant, consultant_name, count_words(transcript), source_label, sheets_service)
+
+
+async def generate_call_note(
+    transcript: str,
+    consultant: Dict[str, Any],
+    consultant_name: str,
+    candidate_name: str,
+    call_date: str,
+    source_label: str,
+    sheets_service,
+    prompts: Optional[PromptSet] = None,
+    stream: bool = False,
+    bypass_cache: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Gemini half of the pipeline: gate the transcript, run the desk prompt and build the card.
+    Returns {'card', 'notes', 'prompt', 'prompt_version', 'activity_id', 'route'}, or None if
+    the call was skipped (already logged). Pass a cached PromptSet to avoid reading the Prompts sheet.
+    With stream=True (in the bot process) the notes are posted to the consultant as they are
+    written; 'activity_id' is that card, for deliver_call_note to finish in place.
+    bypass_cache=True runs Gemini even if the same prompt's notes are cached (forced reprocessing).
+    """
     word_count = count_words(transcript)
     logger.info(f"Transcript word count: {word_count} (source: {source_label})")
 
     # Word count gate
     if word_count < WORD_COUNT_THRESHOLD:
         log_skipped_call(sheets_service, source_label, word_count, "Too short", consultant_name)
-        return
+        return None
 
     if not consultant['Active']:
         log_skipped_call(sheets_service, source_label, word_count, "Inactive consultant", consultant_name)
-        return
+        return None
 
-    teams_user_id = consultant['TeamsUserId']
-    desk = consultant['Desk']
-
-    if not teams_user_id:
+    if not consultant['TeamsUserId']:
         log_skipped_call(sheets_service, source_label, word_count, "No TeamsUserId", consultant_name)
-        return
+        return None
+
+    desk = consultant['Desk']
 
     # Get desk prompt
-    prompts = get_prompts(sheets_service)
-    prompt_template = prompts.get(desk)
-    if not prompt_template:
-        prompt_template = prompts.get('Default', 'Please summarize this call transcript:\n\n{{transcript_text}}')
-
-    # Call Gemini 2.5 Pro
-    logger.info(f"Calling Gemini 2.5 Pro for {source_label}")
-    notes = call_gemini(
-        prompt_template,
-        transcript,
-        consultant_name,
-        candidate_name,
-    )
+    if prompts is None:
+        def _read_prompts():
+            service = sheets_service or get_google_services()
+            return PromptSet(get_prompts(service), get_routing_rules(service))
+        prompts = await asyncio.to_thread(_read_prompts)
+    prompt_template = prompts.for_desk(desk)
+    route = prompts.router.route(desk, word_count)
+
+    # Strip fillers, stutters and repeats to cut Gemini input tokens
+    compacted = await asyncio.to_thread(transcript_compaction.compact, transcript)
+    if compacted.tokens_after < compacted.tokens_before:
+        logger.info(f"Compacted transcript: ~{compacted.tokens_before} -> ~{compacted.tokens_after} tokens "
+                    f"({compacted.tokens_before - compacted.tokens_after} saved)")
+
+    logger.info(f"Calling Gemini ({route.name} route, {route.model}) for {source_label} ({word_count} words)")
+    rendered = prompt_template.render(compacted.text, consultant_name, candidate_name)
+    progress = None
+    if stream and _card_updater is not None:
+        progress = ProgressiveCard(consultant['TeamsUserId'], candidate_name, call_date, source_label)
+    try:
+        started = time.monotonic()
+        notes = await call_gemini(rendered, on_progress=progress.update if progress else None, route=route,
+                                  bypass_cache=bypass_cache)
+    except Exception:
+        if progress:
+            await progress.abandon()
+        raise
 
     # Build adaptive card
-    card = build_adaptive_card(candidate_name, call_date, notes, source_label)
+    return {
+        'card': build_adaptive_card(candidate_name, call_date, notes, source_label),
+        'notes': notes,
+        'prompt': rendered.text,
+        'prompt_version': prompt_template.version,
+        'activity_id': progress.activity_id if progress else None,
+        'route': {
+            'name': route.name,
+            'model': route.model,
+            'max_output_tokens': route.max_output_tokens,
+            'temperature': route.temperature,
+            'word_count': word_count,
+            'gemini_seconds': round(time.monotonic() - started, 2),
+        },
+    }
+
+
+async def deliver_call_note(
+    card: dict,
+    consultant: Dict[str, Any],
+    consultant_name: str,
+    word_count: int,
+    source_label: str,
+    sheets_service,
+    activity_id: Optional[str] = None,
+) -> bool:
+    """
+    Delivery half of the pipeline: send the card via Christina. Returns True if delivered.
+    With the activity_id of a progressive card, that card is replaced with the final one.
+    """
+    success = False
+    if activity_id and _card_updater is not None:
+        try:
+            success, error, _ = await _card_updater(consultant['TeamsUserId'], card, activity_id)
+        except Exception as e:
+            success, error = False, str(e)
+        if success:
+            logger.info(f"Finalised progressive card for {consultant_name}")
+        else:
+            logger.warning(f"Could not update progressive card for {consultant_name} ({error}) — sending a new one")
 
-    # Send via Christina bot
-    success = send_via_christina(teams_user_id, card, consultant_name)
+    if not success:
+        success = await send_via_christina(consultant['TeamsUserId'], card, consultant_name)
 
     if not success:
         log_skipped_call(sheets_service, source_label, word_count, "Christina delivery failed - user not registered", consultant_name)
-        return
+        return False
 
     logger.info(f"Successfully processed: {source_label}")
+    return True
 
 
 # ============================================================================
@@ -605,8 +1110,8 @@ def process_transcript(
 # ============================================================================
 
 # To re-enable the Drive poller:
-# 1. Add 'https://www.googleapis.com/auth/drive' back to scopes in get_google_services()
-# 2. Restore drive_service return from get_google_services()
+# 1. Add 'https://www.googleapis.com/auth/drive' back to SCOPES in sheets_client.py
+# 2. Build a drive service (static discovery doc 'drive', 'v3') and return it from get_google_services()
 # 3. Uncomment run_once() and process_single_file() below
 # 4. Re-add the processor loop call in main.py
 
@@ -706,13 +1211,8 @@ def parse_filename(filename: str) -> Dict[str, str]:
     return result
 
 
-def find_consultant_in_filename(filename: str, consultants: Dict[str, Dict]) -> tuple:
-    filename_lower = filename.lower()
-    sorted_consultants = sorted(consultants.items(), key=lambda x: len(x[0]), reverse=True)
-    for name_key, consultant_data in sorted_consultants:
-        if name_key in filename_lower:
-            return consultant_data, consultant_data['Name']
-    return None, ''
+def find_consultant_in_filename(filename: str, consultants) -> tuple:
+    return _as_index(consultants).in_text(filename.lower())
 
 
 def process_single_file(drive_service, sheets_service, file, consultants, prompts):
@@ -768,7 +1268,7 @@ def run_once():
     logger.info("-" * 40)
     logger.info("Starting processing cycle...")
     drive_service, sheets_service = get_google_services()
-    consultants = get_consultants(sheets_service)
+    consultants = ConsultantIndex(get_consultants(sheets_service))
     prompts = get_prompts(sheets_service)
     logger.info(f"Loaded {len(consultants)} consultants, {len(prompts)} prompts")
     files = get_new_pdf_files(drive_service)
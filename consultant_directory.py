@@ -0,0 +1,53 @@
+"""
+Consultant Directory
+Process-wide cache of the Consultants sheet, held as a prebuilt ConsultantIndex.
+
+The sheet changes maybe once a week, so instead of re-reading Consultants!A:K
+for every call, the directory is loaded once and refreshed by a background
+task every CONSULTANT_CACHE_TTL_SECONDS. If Sheets is unavailable the last
+good copy keeps being served.
+"""
+
+import os
+import logging
+from typing import Dict, Any
+
+import call_notes_processor as processor
+from sheet_cache import SheetCache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CONSULTANT_CACHE_TTL_SECONDS = int(os.environ.get("CONSULTANT_CACHE_TTL_SECONDS", "900"))
+
+
+def _load(previous):
+    """Read the Consultants sheet and index it (blocking — runs in a thread)."""
+    sheets_service = processor.get_google_services()
+    index = processor.ConsultantIndex(processor.get_consultants(sheets_service))
+    logger.info(f"Loaded {len(index)} consultants into directory")
+    return index
+
+
+_cache = SheetCache("Consultant directory", _load, CONSULTANT_CACHE_TTL_SECONDS)
+
+
+async def get_consultants() -> processor.ConsultantIndex:
+    """Return the cached consultant index, loading it on first use."""
+    return await _cache.get()
+
+
+async def reload() -> bool:
+    """Reload the directory now. Returns False if Sheets failed and the cached copy was kept."""
+    return await _cache.reload()
+
+
+async def run_refresher():
+    """Background task: reload the directory every TTL, off the request path."""
+    await _cache.run_refresher()
+
+
+def stats() -> Dict[str, Any]:
+    """Directory size, age and reload counters (for /health)."""
+    index = _cache.value
+    return dict(_cache.stats(), consultants=len(index) if index is not None else 0)
@@ -0,0 +1,100 @@
+"""
+Webhook Deduplication
+Remembers which Aircall call_ids have already been accepted so retried
+webhooks and repeated /retry hits don't transcribe and summarise a call twice.
+
+An in-memory LRU answers the hot path; a SQLite seen-set (with a TTL) keeps
+the memory across restarts.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+DEDUP_DB_PATH = os.environ.get("DEDUP_DB_PATH", os.path.join(DATA_DIR, "seen_calls.sqlite3"))
+DEDUP_TTL_SECONDS = int(os.environ.get("DEDUP_TTL_SECONDS", str(7 * 24 * 3600)))
+DEDUP_LRU_SIZE = int(os.environ.get("DEDUP_LRU_SIZE", "5000"))
+
+_lru = OrderedDict()  # call_id -> seen_at (epoch seconds)
+_conn = None
+_lock = threading.Lock()
+_stats = {"accepted": 0, "duplicates": 0, "forced": 0}
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Open the seen-set database (once per process)."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(DEDUP_DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DEDUP_DB_PATH, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS seen_calls (call_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        conn.execute("DELETE FROM seen_calls WHERE seen_at < ?", (time.time() - DEDUP_TTL_SECONDS,))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _remember(call_id: str, seen_at: float):
+    """Put a call_id at the front of the LRU, evicting the oldest entries."""
+    _lru[call_id] = seen_at
+    _lru.move_to_end(call_id)
+    while len(_lru) > DEDUP_LRU_SIZE:
+        _lru.popitem(last=False)
+
+
+def _seen_at(call_id: str):
+    """When the call was first accepted (within the TTL), or None."""
+    cutoff = time.time() - DEDUP_TTL_SECONDS
+
+    seen_at = _lru.get(call_id)
+    if seen_at is None:
+        row = _get_conn().execute("SELECT seen_at FROM seen_calls WHERE call_id = ?", (call_id,)).fetchone()
+        seen_at = row[0] if row else None
+
+    if seen_at is None or seen_at < cutoff:
+        return None
+    _remember(call_id, seen_at)
+    return seen_at
+
+
+def claim(call_id: str, force: bool = False) -> bool:
+    """
+    Atomically check-and-mark a call_id.
+    Returns True if the caller should process the call, False if it is a duplicate.
+    force=True always claims (deliberate reprocessing).
+    """
+    with _lock:
+        if not force and _seen_at(call_id) is not None:
+            _stats["duplicates"] += 1
+            return False
+
+        now = time.time()
+        conn = _get_conn()
+        conn.execute("INSERT OR REPLACE INTO seen_calls (call_id, seen_at) VALUES (?, ?)", (call_id, now))
+        conn.commit()
+        _remember(call_id, now)
+        _stats["forced" if force else "accepted"] += 1
+        return True
+
+
+def forget(call_id: str):
+    """Drop a call_id so the next webhook or retry for it is accepted (e.g. after a failure)."""
+    with _lock:
+        _lru.pop(call_id, None)
+        conn = _get_conn()
+        conn.execute("DELETE FROM seen_calls WHERE call_id = ?", (call_id,))
+        conn.commit()
+
+
+def stats() -> Dict[str, Any]:
+    """Dedup counters (for /health)."""
+    with _lock:
+        return dict(_stats, lru_size=len(_lru), ttl_seconds=DEDUP_TTL_SECONDS)
@@ -0,0 +1,123 @@
+"""
+Disk Cache
+Small persistent key/value cache for expensive upstream results
+(transcripts, Gemini extractions), kept in a SQLite file under DATA_DIR.
+
+Entries are evicted least-recently-used once the cache exceeds max_bytes,
+and expire after ttl_seconds if one is set. Values are JSON.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """A size-bounded LRU (with optional TTL) persisted in one SQLite file. Thread-safe."""
+
+    def __init__(self, name: str, path: str, max_bytes: int, ttl_seconds: Optional[int] = None):
+        self.name = name
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the cache database (once per process)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss (or an expired entry)."""
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and self.ttl_seconds and row[1] < now - self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                self._stats["expired"] += 1
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting least-recently-used entries past max_bytes."""
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._stats["stores"] += 1
+            self._evict(conn)
+            conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete entries past ttl_seconds. Returns the number deleted."""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            conn = self._get_conn()
+            deleted = conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)).rowcount
+            conn.commit()
+            self._stats["expired"] += deleted
+        if deleted:
+            logger.info(f"{self.name}: purged {deleted} expired entries")
+        return deleted
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then the least recently used until under max_bytes."""
+        if self.ttl_seconds:
+            deleted = conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)).rowcount
+            self._stats["expired"] += deleted
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY used_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, size and eviction counters (for /health)."""
+        with self._lock:
+            entries, size = self._get_conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                hit_rate=round(self._stats["hits"] / lookups, 3) if lookups else None,
+                entries=entries,
+                size_bytes=size,
+                max_bytes=self.max_bytes,
+            )
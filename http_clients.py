@@ -0,0 +1,183 @@
+"""
+Shared HTTP Clients
+Central registry of keep-alive HTTP clients, one connection pool per upstream.
+
+- aiohttp sessions for the async call pipeline: "aircall" (API), "recordings"
+  (pre-signed S3 downloads), "gemini", "bot" (loopback delivery fallback)
+- requests sessions for synchronous callers: "graph" (GraphAPIClient,
+  setup_channels); urllib3 pools are thread-safe and shared across threads
+- one AsyncAzureOpenAI client per endpoint for transcription ("azure_openai"),
+  on an httpx client with its own pool size, timeout and retry count
+
+Each aiohttp session counts new vs reused connections via a TraceConfig, the
+httpx client via httpcore's connection trace, and the requests pools report
+connections opened vs requests sent, so /health shows how many TCP+TLS
+handshakes keep-alive is saving.
+"""
+
+import os
+import logging
+from typing import Dict, Any
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_SYNC_POOL_SIZE = int(os.environ.get("HTTP_SYNC_POOL_SIZE", "10"))
+
+# Azure OpenAI transcription uploads: chunks go up in parallel and can take minutes each
+AZURE_OPENAI_POOL_SIZE = int(os.environ.get("AZURE_OPENAI_POOL_SIZE", "8"))
+AZURE_OPENAI_TIMEOUT_SECONDS = float(os.environ.get("AZURE_OPENAI_TIMEOUT_SECONDS", "300"))
+AZURE_OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("AZURE_OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+AZURE_OPENAI_MAX_RETRIES = int(os.environ.get("AZURE_OPENAI_MAX_RETRIES", "2"))
+
+# Per-upstream pool size and default total timeout (call sites may pass their own)
+UPSTREAMS = {
+    "default": {"limit_per_host": HTTP_POOL_LIMIT_PER_HOST, "timeout": 60},
+    "aircall": {"limit_per_host": 10, "timeout": 30},
+    "recordings": {"limit_per_host": 10, "timeout": 300},
+    "gemini": {"limit_per_host": 20, "timeout": 120},
+    "bot": {"limit_per_host": 10, "timeout": 30},
+}
+
+_sessions = {}
+_sync_sessions = {}
+_openai_clients = {}
+_stats = {}
+
+
+def _trace_config(stats: Dict[str, int]) -> aiohttp.TraceConfig:
+    """Count requests and new vs reused connections for one upstream."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        stats["requests"] += 1
+
+    async def on_connection_create_end(session, ctx, params):
+        stats["connections_created"] += 1
+
+    async def on_connection_reuseconn(session, ctx, params):
+        stats["connections_reused"] += 1
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace
+
+
+def get_session(upstream: str = "default") -> aiohttp.ClientSession:
+    """Return the upstream's shared session, creating it on the running event loop on first use."""
+    session = _sessions.get(upstream)
+    if session is None or session.closed:
+        config = UPSTREAMS.get(upstream, UPSTREAMS["default"])
+        stats = _stats.setdefault(upstream, {"requests": 0, "connections_created": 0, "connections_reused": 0})
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=config["limit_per_host"],
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config["timeout"]),
+            trace_configs=[_trace_config(stats)],
+        )
+        _sessions[upstream] = session
+    return session
+
+
+def get_requests_session(upstream: str = "graph") -> requests.Session:
+    """Return a shared keep-alive requests.Session for synchronous callers."""
+    session = _sync_sessions.get(upstream)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_SYNC_POOL_SIZE, pool_maxsize=HTTP_SYNC_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session = _sync_sessions.setdefault(upstream, session)
+    return session
+
+
+def _httpx_client(stats: Dict[str, int]):
+    """An httpx.AsyncClient sized for Azure OpenAI that counts requests and new connections."""
+    try:
+        import httpx
+    except ImportError:  # recent openai releases are built on the httpx2 fork
+        import httpx2 as httpx
+
+    async def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            stats["connections_created"] += 1
+
+    async def on_request(request):
+        stats["requests"] += 1
+        request.extensions["trace"] = trace
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=AZURE_OPENAI_POOL_SIZE,
+            max_keepalive_connections=AZURE_OPENAI_POOL_SIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(AZURE_OPENAI_TIMEOUT_SECONDS, connect=AZURE_OPENAI_CONNECT_TIMEOUT_SECONDS),
+        event_hooks={"request": [on_request]},
+    )
+
+
+def get_azure_openai_client(endpoint: str, api_key: str, api_version: str):
+    """Return the shared AsyncAzureOpenAI client for an endpoint (its httpx pool is reused across calls)."""
+    key = (endpoint, api_key, api_version)
+    client = _openai_clients.get(key)
+    if client is None:
+        from openai import AsyncAzureOpenAI
+        stats = _stats.setdefault("azure_openai", {"requests": 0, "connections_created": 0})
+        client = AsyncAzureOpenAI(
+            azure_endpoint=endpoint,
+            api_key=api_key,
+            api_version=api_version,
+            timeout=AZURE_OPENAI_TIMEOUT_SECONDS,
+            max_retries=AZURE_OPENAI_MAX_RETRIES,
+            http_client=_httpx_client(stats),
+        )
+        _openai_clients[key] = client
+    return client
+
+
+def _sync_stats(session: requests.Session) -> Dict[str, int]:
+    """Connections opened vs requests sent across a requests session's urllib3 pools."""
+    created = sent = 0
+    for adapter in set(session.adapters.values()):
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                created += pool.num_connections
+                sent += pool.num_requests
+    return {"requests": sent, "connections_created": created, "connections_reused": max(0, sent - created)}
+
+
+def stats() -> Dict[str, Any]:
+    """Per-upstream request and connection reuse counters (for /health)."""
+    result = {name: dict(counters) for name, counters in _stats.items()}
+    for name, session in _sync_sessions.items():
+        result[name] = _sync_stats(session)
+    if "azure_openai" in result:
+        counters = result["azure_openai"]
+        counters["connections_reused"] = max(0, counters["requests"] - counters["connections_created"])
+        counters["clients"] = len(_openai_clients)
+    return result
+
+
+async def close():
+    """Close all shared async clients (app shutdown)."""
+    for session in list(_sessions.values()):
+        if not session.closed:
+            await session.close()
+    _sessions.clear()
+    for client in list(_openai_clients.values()):
+        await client.close()
+    _openai_clients.clear()
@@ -0,0 +1,237 @@
+"""
+Durable Job Store
+SQLite-backed record of every Aircall call accepted for processing.
+
+Each job keeps the call metadata, the last pipeline stage it completed and the
+outputs of completed stages, so after a restart unfinished calls resume from
+their last checkpoint instead of paying for transcription/Gemini again.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Configuration — point DATA_DIR at a Railway volume so jobs survive redeploys
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+RECORDINGS_DIR = os.path.join(DATA_DIR, "recordings")
+JOB_RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS", "30"))
+# Recordings untouched this long with no pending job are leftovers of failed/skipped calls
+ORPHAN_RECORDING_SECONDS = int(os.environ.get("ORPHAN_RECORDING_SECONDS", "3600"))
+
+# Pipeline stages, in order
+STAGES = ("lookup", "download", "transcribe", "gemini", "deliver")
+
+# Job statuses
+PENDING = "pending"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+SHED = "shed"
+
+# Stage outputs dropped from a job once it is done or skipped (the artifact store keeps them)
+_BULKY_STATE_KEYS = ("transcript", "card")
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Open the job database (once per process) and create the schema."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(JOB_STORE_PATH) or ".", exist_ok=True)
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        conn = sqlite3.connect(JOB_STORE_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                call_id TEXT PRIMARY KEY,
+                call_meta TEXT NOT NULL,
+                stage TEXT,
+                status TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT '{}',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status)")
+        conn.commit()
+        _conn = conn
+        logger.info(f"Job store opened: {JOB_STORE_PATH}")
+    return _conn
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "call_id": row["call_id"],
+        "call_meta": json.loads(row["call_meta"]),
+        "stage": row["stage"],
+        "status": row["status"],
+        "state": json.loads(row["state"]),
+        "attempts": row["attempts"],
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def save_new_job(call_meta: dict) -> Dict[str, Any]:
+    """
+    Persist a call on receipt.
+    A job that is still pending keeps its checkpoints (only call_meta is refreshed);
+    a finished, failed or unknown job starts again from scratch.
+    """
+    call_id = call_meta["call_id"]
+    now = datetime.now().isoformat()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT status FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+        if row and row["status"] == PENDING:
+            conn.execute(
+                "UPDATE jobs SET call_meta = ?, updated_at = ? WHERE call_id = ?",
+                (json.dumps(call_meta), now, call_id),
+            )
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (call_id, call_meta, stage, status, state, attempts, error, created_at, updated_at) "
+                "VALUES (?, ?, NULL, ?, '{}', 0, NULL, ?, ?)",
+                (call_id, json.dumps(call_meta), PENDING, now, now),
+            )
+        conn.commit()
+        job = conn.execute("SELECT * FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+    return _row_to_job(job)
+
+
+def get_job(call_id: str) -> Optional[Dict[str, Any]]:
+    """Return the stored job for a call, or None."""
+    with _lock:
+        row = _get_conn().execute("SELECT * FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def update_call_meta(call_id: str, call_meta: dict):
+    """Replace a job's call metadata (e.g. once a pending recording URL arrives)."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "UPDATE jobs SET call_meta = ?, updated_at = ? WHERE call_id = ?",
+            (json.dumps(call_meta), datetime.now().isoformat(), call_id),
+        )
+        conn.commit()
+
+
+def mark_started(call_id: str):
+    """Count a processing attempt."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE call_id = ?",
+            (datetime.now().isoformat(), call_id),
+        )
+        conn.commit()
+
+
+def checkpoint(call_id: str, stage: str, **outputs):
+    """Record that a stage completed, merging its outputs into the job state."""
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT state FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+        state = json.loads(row["state"]) if row else {}
+        state.update(outputs)
+        conn.execute(
+            "UPDATE jobs SET stage = ?, state = ?, updated_at = ? WHERE call_id = ?",
+            (stage, json.dumps(state), datetime.now().isoformat(), call_id),
+        )
+        conn.commit()
+    logger.info(f"Checkpoint: call {call_id} completed stage '{stage}'")
+
+
+def finish(call_id: str, status: str, error: str = None):
+    """
+    Mark a job as no longer pending (done, skipped, failed or shed).
+    Done and skipped jobs drop their bulky stage outputs (transcript, card).
+    """
+    with _lock:
+        conn = _get_conn()
+        if status in (DONE, SKIPPED):
+            row = conn.execute("SELECT state FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+            if row:
+                state = {k: v for k, v in json.loads(row["state"]).items() if k not in _BULKY_STATE_KEYS}
+                conn.execute("UPDATE jobs SET state = ? WHERE call_id = ?", (json.dumps(state), call_id))
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE call_id = ?",
+            (status, error, datetime.now().isoformat(), call_id),
+        )
+        conn.commit()
+
+
+def stage_done(job: Dict[str, Any], stage: str) -> bool:
+    """True if the job has already completed the given stage."""
+    if not job or not job.get("stage"):
+        return False
+    return STAGES.index(job["stage"]) >= STAGES.index(stage)
+
+
+def pending_jobs() -> List[Dict[str, Any]]:
+    """All jobs that were accepted but never finished, oldest first."""
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (PENDING,)
+        ).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+def recording_path(call_id: str) -> str:
+    """Where a call's downloaded recording is checkpointed on disk."""
+    return os.path.join(RECORDINGS_DIR, f"{call_id}.mp3")
+
+
+def purge_expired() -> int:
+    """
+    Delete finished jobs last updated more than JOB_RETENTION_DAYS ago, and
+    recordings no pending job needs. Returns jobs purged.
+    """
+    cutoff = (datetime.now() - timedelta(days=JOB_RETENTION_DAYS)).isoformat()
+    with _lock:
+        conn = _get_conn()
+        purged = conn.execute("DELETE FROM jobs WHERE status != ? AND updated_at < ?", (PENDING, cutoff)).rowcount
+        conn.commit()
+        pending = {row["call_id"] for row in conn.execute("SELECT call_id FROM jobs WHERE status = ?", (PENDING,))}
+
+    removed = 0
+    stale = time.time() - ORPHAN_RECORDING_SECONDS
+    for name in os.listdir(RECORDINGS_DIR):
+        path = os.path.join(RECORDINGS_DIR, name)
+        # <call_id>.mp3 or <call_id>.mp3.part
+        if name.split(".", 1)[0] in pending:
+            continue
+        try:
+            if os.path.getmtime(path) < stale:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+
+    if purged or removed:
+        logger.info(f"Purged {purged} jobs older than {JOB_RETENTION_DAYS} days and {removed} orphaned recordings")
+    return purged
+
+
+def counts() -> Dict[str, int]:
+    """Number of jobs per status (for /health)."""
+    with _lock:
+        rows = _get_conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    return {row["status"]: row["n"] for row in rows}
@@ -0,0 +1,53 @@
+"""
+Event Loop Monitor
+Measures how long the aiohttp event loop is stalled by blocking work.
+
+A background task sleeps for LOOP_LAG_INTERVAL_SECONDS and records how late
+it wakes up. Any lag means something ran on the loop without yielding — every
+webhook, Teams message and /api/send-note request waits that long. Stalls over
+LOOP_LAG_WARN_SECONDS are logged; recent and worst-case lag are on /health.
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LOOP_LAG_INTERVAL_SECONDS = float(os.environ.get("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+LOOP_LAG_WARN_SECONDS = float(os.environ.get("LOOP_LAG_WARN_SECONDS", "0.25"))
+LOOP_LAG_WINDOW = 120  # samples kept for the recent figures (~1 minute)
+
+_recent = deque(maxlen=LOOP_LAG_WINDOW)
+_stats = {"samples": 0, "stalls": 0, "max_lag_ms": 0.0}
+
+
+async def run():
+    """Background task: sample event loop lag until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL_SECONDS)
+
+        _recent.append(lag)
+        _stats["samples"] += 1
+        _stats["max_lag_ms"] = max(_stats["max_lag_ms"], lag * 1000)
+        if lag > LOOP_LAG_WARN_SECONDS:
+            _stats["stalls"] += 1
+            logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms — blocking work is running on the loop")
+
+
+def stats() -> Dict[str, Any]:
+    """Recent and worst-case loop lag (for /health)."""
+    recent = sorted(_recent)
+    return dict(
+        _stats,
+        max_lag_ms=round(_stats["max_lag_ms"], 1),
+        recent_max_lag_ms=round(recent[-1] * 1000, 1) if recent else None,
+        recent_p95_lag_ms=round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1) if recent else None,
+        warn_threshold_ms=LOOP_LAG_WARN_SECONDS * 1000,
+    )
@@ -6,6 +6,7 @@ Updated March 2026: Replaced Google Drive polling with Aircall webhook input.
 """
 
 import os
+import re
 import asyncio
 import threading
 import time
@@ -19,6 +20,18 @@ logger = logging.getLogger(__name__)
 # Import modules
 import call_notes_processor as processor
 import aircall_handler
+import worker_pool
+import job_store
+import dedup
+import http_clients
+import consultant_directory
+import prompt_cache
+import audit_log
+import artifact_store
+import transcript_compaction
+import loop_monitor
+import model_router
+import retry_policy
 
 # Bot server imports
 import json
@@ -27,9 +40,7 @@ from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings, Tu
 from botbuilder.schema import Activity, ActivityTypes, Attachment, ConversationReference
 
 # Google Sheets for persistent storage
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-import base64
+import sheets_client
 
 # ============================================================================
 # BOT CONFIGURATION
@@ -49,43 +60,42 @@ ADAPTER = BotFrameworkAdapter(SETTINGS)
 # Conversation references for proactive messaging
 CONVERSATION_REFERENCES = {}
 
-# Google Sheets configuration (same as processor)
-GOOGLE_SERVICE_ACCOUNT_JSON = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")
-GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE", "meraki-n8n-automation-66a9d5aafc1e.json")
-GOOGLE_SPREADSHEET_ID = os.environ.get("GOOGLE_SPREADSHEET_ID", "1Z_5rhbhe4lW13t4DKOzhWW-cKLbeyneUHTZXBUmBM-g")
+# ConversationReferences sheet bookkeeping: user -> 1-indexed sheet row, whether that
+# index reflects the sheet, and references changed since the last write (user -> UpdatedAt)
+_CONV_REF_ROWS = {}
+_CONV_REF_INDEXED = False
+_CONV_REF_SHEET_EXISTS = True
+_CONV_REF_DIRTY = {}
+_CONV_REF_LOCK = threading.Lock()
+_CONV_REF_FLUSH_LOCK = threading.Lock()
+CONV_REF_FLUSH_SECONDS = float(os.environ.get("CONV_REF_FLUSH_SECONDS", "2"))
+_CONV_REF_STATS = {"unchanged_skipped": 0, "rows_written": 0, "api_calls": 0, "write_failures": 0}
 
-# Sheets service (initialized on first use)
-_sheets_service = None
+GOOGLE_SPREADSHEET_ID = os.environ.get("GOOGLE_SPREADSHEET_ID", "1Z_5rhbhe4lW13t4DKOzhWW-cKLbeyneUHTZXBUmBM-g")
 
 
 def get_sheets_service():
-    """Get Google Sheets service (singleton)."""
-    global _sheets_service
-    if _sheets_service is None:
-        scopes = ['https://www.googleapis.com/auth/spreadsheets']
+    """Get the shared Google Sheets service (see sheets_client)."""
+    return sheets_client.get_sheets_service()
 
-        if GOOGLE_SERVICE_ACCOUNT_JSON:
-            json_str = GOOGLE_SERVICE_ACCOUNT_JSON
-            try:
-                json_str = base64.b64decode(json_str).decode('utf-8')
-            except Exception:
-                pass
-            service_account_info = json.loads(json_str)
-            credentials = service_account.Credentials.from_service_account_info(
-                service_account_info, scopes=scopes
-            )
-        else:
-            credentials = service_account.Credentials.from_service_account_file(
-                GOOGLE_SERVICE_ACCOUNT_FILE, scopes=scopes
-            )
 
-        _sheets_service = build('sheets', 'v4', credentials=credentials)
-    return _sheets_service
+def _sheet_missing(error: Exception) -> bool:
+    return "Unable to parse range" in str(error) or "not found" in str(error).lower()
+
+
+def _index_conversation_reference_rows(rows: list):
+    """Rebuild the user -> sheet row index from a read of column A onwards (row 1 is the header)."""
+    global _CONV_REF_INDEXED
+    _CONV_REF_ROWS.clear()
+    for i, row in enumerate(rows[1:], start=2):
+        if row and row[0]:
+            _CONV_REF_ROWS.setdefault(row[0], i)
+    _CONV_REF_INDEXED = True
 
 
 def load_conversation_references():
-    """Load conversation references from Google Sheets."""
-    global CONVERSATION_REFERENCES
+    """Load conversation references from Google Sheets and index their rows."""
+    global _CONV_REF_SHEET_EXISTS, _CONV_REF_INDEXED
     try:
         sheets = get_sheets_service()
         result = sheets.spreadsheets().values().get(
@@ -103,13 +113,18 @@ def load_conversation_references():
                         CONVERSATION_REFERENCES[user_id] = json.loads(conv_ref_json)
                     except json.JSONDecodeError:
                         logger.warning(f"Invalid JSON for user {user_id}")
+        _index_conversation_reference_rows(rows)
 
         logger.info(f"Loaded {len(CONVERSATION_REFERENCES)} conversation references from Google Sheets")
     except Exception as e:
         # If sheet doesn't exist yet, that's okay
-        if "Unable to parse range" in str(e) or "not found" in str(e).lower():
+        if _sheet_missing(e):
+            _CONV_REF_SHEET_EXISTS = False
+            _CONV_REF_ROWS.clear()
+            _CONV_REF_INDEXED = True
             logger.info("ConversationReferences sheet not found - will be created on first registration")
         else:
+            # Left unindexed: the writer re-reads the rows before its first write
             logger.error(f"Error loading conversation references: {e}")
 
 
@@ -147,65 +162,128 @@ def create_conversation_references_sheet(sheets):
         return False
 
 
-def save_conversation_reference(user_id: str, conv_ref: dict):
-    """Save a single conversation reference to Google Sheets."""
+def _same_conversation_reference(a: dict, b: dict) -> bool:
+    """Compare references ignoring activity_id, which changes on every message."""
+    if a is None or b is None:
+        return False
+    return {k: v for k, v in a.items() if k != 'activity_id'} == {k: v for k, v in b.items() if k != 'activity_id'}
+
+
+def save_conversation_reference(user_id: str, conv_ref: dict) -> bool:
+    """
+    Cache a conversation reference and queue it for the sheet if it changed.
+    Never touches Sheets — run_conversation_reference_writer persists queued
+    references off the event loop. Returns False when the stored reference is unchanged.
+    """
+    with _CONV_REF_LOCK:
+        if _same_conversation_reference(CONVERSATION_REFERENCES.get(user_id), conv_ref):
+            _CONV_REF_STATS["unchanged_skipped"] += 1
+            return False
+        CONVERSATION_REFERENCES[user_id] = conv_ref
+        _CONV_REF_DIRTY[user_id] = datetime.now().isoformat()
+    return True
+
+
+def _read_conversation_reference_index(sheets):
+    """Index the sheet's rows by user (column A only), or note that the sheet doesn't exist."""
+    global _CONV_REF_SHEET_EXISTS
     try:
-        sheets = get_sheets_service()
-        timestamp = datetime.now().isoformat()
-        conv_ref_json = json.dumps(conv_ref)
+        result = sheets.spreadsheets().values().get(
+            spreadsheetId=GOOGLE_SPREADSHEET_ID,
+            range='ConversationReferences!A:A'
+        ).execute()
+    except Exception as e:
+        if not _sheet_missing(e):
+            raise
+        _CONV_REF_SHEET_EXISTS = False
+        _index_conversation_reference_rows([])
+        return
+    _CONV_REF_STATS["api_calls"] += 1
+    _index_conversation_reference_rows(result.get('values', []))
+
+
+def flush_conversation_references():
+    """
+    Write all changed references: users already in the sheet in a single batchUpdate
+    by their indexed row, new users with one append. Until the row index has been read
+    successfully nothing is written, so a failed read can't overwrite other users' rows.
+    """
+    global _CONV_REF_SHEET_EXISTS, _CONV_REF_INDEXED
+    with _CONV_REF_FLUSH_LOCK:
+        with _CONV_REF_LOCK:
+            if not _CONV_REF_DIRTY:
+                return
+            dirty = dict(_CONV_REF_DIRTY)
+            _CONV_REF_DIRTY.clear()
+            values = {user_id: [user_id, json.dumps(CONVERSATION_REFERENCES[user_id]), timestamp]
+                      for user_id, timestamp in dirty.items()}
 
-        # First, try to find if user already exists
         try:
-            result = sheets.spreadsheets().values().get(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range='ConversationReferences!A:A'
-            ).execute()
-            rows = result.get('values', [])
-
-            # Find row index for this user (1-indexed)
-            row_index = None
-            for i, row in enumerate(rows):
-                if row and row[0] == user_id:
-                    row_index = i + 1  # 1-indexed
-                    break
-
-            if row_index:
-                # Update existing row
-                sheets.spreadsheets().values().update(
+            sheets = get_sheets_service()
+            if not _CONV_REF_INDEXED:
+                _read_conversation_reference_index(sheets)
+            if not _CONV_REF_SHEET_EXISTS:
+                if not create_conversation_references_sheet(sheets):
+                    raise Exception("ConversationReferences sheet could not be created")
+                _CONV_REF_SHEET_EXISTS = True
+
+            data = [{'range': f'ConversationReferences!A{_CONV_REF_ROWS[user_id]}:C{_CONV_REF_ROWS[user_id]}',
+                     'values': [row]}
+                    for user_id, row in values.items() if user_id in _CONV_REF_ROWS]
+            new_users = [user_id for user_id in values if user_id not in _CONV_REF_ROWS]
+
+            if data:
+                sheets.spreadsheets().values().batchUpdate(
                     spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                    range=f'ConversationReferences!A{row_index}:C{row_index}',
-                    valueInputOption='RAW',
-                    body={'values': [[user_id, conv_ref_json, timestamp]]}
+                    body={'valueInputOption': 'RAW', 'data': data}
                 ).execute()
-                logger.info(f"Updated conversation reference for user: {user_id}")
-            else:
-                # Append new row
-                sheets.spreadsheets().values().append(
+                _CONV_REF_STATS["api_calls"] += 1
+                _CONV_REF_STATS["rows_written"] += len(data)
+
+            if new_users:
+                result = sheets.spreadsheets().values().append(
                     spreadsheetId=GOOGLE_SPREADSHEET_ID,
                     range='ConversationReferences!A:C',
                     valueInputOption='RAW',
-                    body={'values': [[user_id, conv_ref_json, timestamp]]}
+                    insertDataOption='INSERT_ROWS',
+                    body={'values': [values[user_id] for user_id in new_users]}
                 ).execute()
-                logger.info(f"Added new conversation reference for user: {user_id}")
+                _CONV_REF_STATS["api_calls"] += 1
+                _CONV_REF_STATS["rows_written"] += len(new_users)
+                # Index the appended rows; if the response doesn't say where, re-read before the next write
+                match = re.search(r'!A(\d+)', (result or {}).get('updates', {}).get('updatedRange', ''))
+                if match:
+                    for offset, user_id in enumerate(new_users):
+                        _CONV_REF_ROWS[user_id] = int(match.group(1)) + offset
+                else:
+                    _CONV_REF_INDEXED = False
+
+            logger.info(f"Saved {len(values)} conversation reference(s) to Google Sheets")
 
         except Exception as e:
-            error_str = str(e).lower()
-            if "unable to parse range" in error_str or "not found" in error_str:
-                # Sheet doesn't exist, create it first
-                if create_conversation_references_sheet(sheets):
-                    # Now append the data
-                    sheets.spreadsheets().values().append(
-                        spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                        range='ConversationReferences!A:C',
-                        valueInputOption='RAW',
-                        body={'values': [[user_id, conv_ref_json, timestamp]]}
-                    ).execute()
-                    logger.info(f"Added user to new ConversationReferences sheet: {user_id}")
-            else:
-                raise
+            _CONV_REF_STATS["write_failures"] += 1
+            logger.error(f"Error saving conversation references: {e}")
+            # Re-queue anything not superseded meanwhile, to retry on the next write
+            with _CONV_REF_LOCK:
+                for user_id, timestamp in dirty.items():
+                    _CONV_REF_DIRTY.setdefault(user_id, timestamp)
 
-    except Exception as e:
-        logger.error(f"Error saving conversation reference: {e}")
+
+async def run_conversation_reference_writer():
+    """Background task: write queued references every CONV_REF_FLUSH_SECONDS, in a thread."""
+    while True:
+        await asyncio.sleep(CONV_REF_FLUSH_SECONDS)
+        if _CONV_REF_DIRTY:
+            try:
+                await asyncio.to_thread(flush_conversation_references)
+            except Exception as e:
+                logger.error(f"Conversation reference writer error: {e}")
+
+
+def conversation_reference_stats() -> dict:
+    """Write counters and pending changes for the ConversationReferences sheet (for /health)."""
+    with _CONV_REF_LOCK:
+        return dict(_CONV_REF_STATS, pending=len(_CONV_REF_DIRTY), indexed_rows=len(_CONV_REF_ROWS))
 
 
 def add_conversation_reference(activity: Activity):
@@ -213,13 +291,9 @@ def add_conversation_reference(activity: Activity):
     conv_ref = TurnContext.get_conversation_reference(activity)
     user_id = conv_ref.user.aad_object_id or conv_ref.user.id
 
-    conv_ref_dict = conv_ref.as_dict()
-    CONVERSATION_REFERENCES[user_id] = conv_ref_dict
-
-    # Save to Google Sheets (persistent storage)
-    save_conversation_reference(user_id, conv_ref_dict)
-
-    logger.info(f"Stored conversation reference for user: {user_id}")
+    # Queued for Google Sheets (persistent storage) — skipped if nothing changed
+    if save_conversation_reference(user_id, conv_ref.as_dict()):
+        logger.info(f"Stored conversation reference for user: {user_id}")
     return user_id
 
 
@@ -276,11 +350,21 @@ async def on_turn(turn_context: TurnContext):
 
 async def send_proactive_card(user_aad_id: str, card: dict) -> tuple:
     """Send an adaptive card to a user proactively. Returns (success, error_message)."""
+    success, error, _ = await send_or_update_proactive_card(user_aad_id, card)
+    return success, error
+
+
+async def send_or_update_proactive_card(user_aad_id: str, card: dict, activity_id: str = None) -> tuple:
+    """
+    Send an adaptive card to a user proactively, or replace the card already
+    sent as activity_id. Returns (success, error_message, activity_id).
+    """
     if user_aad_id not in CONVERSATION_REFERENCES:
         logger.warning(f"No conversation reference for user: {user_aad_id}")
-        return False, "User not registered"
+        return False, "User not registered", None
 
     conv_ref_dict = CONVERSATION_REFERENCES[user_aad_id]
+    sent = {}
 
     async def callback(turn_context: TurnContext):
         attachment = Attachment(
@@ -291,99 +375,293 @@ async def send_proactive_card(user_aad_id: str, card: dict) -> tuple:
             type=ActivityTypes.message,
             attachments=[attachment]
         )
-        await turn_context.send_activity(activity)
+        if activity_id:
+            activity.id = activity_id
+            await turn_context.update_activity(activity)
+            sent["id"] = activity_id
+        else:
+            response = await turn_context.send_activity(activity)
+            sent["id"] = response.id if response else None
 
     try:
         conv_ref = ConversationReference().from_dict(conv_ref_dict)
         await ADAPTER.continue_conversation(conv_ref, callback, BOT_APP_ID)
-        logger.info(f"Sent proactive card to user: {user_aad_id}")
-        return True, None
+        if activity_id:
+            logger.debug(f"Updated proactive card {activity_id} for user: {user_aad_id}")
+        else:
+            logger.info(f"Sent proactive card to user: {user_aad_id}")
+        return True, None, sent.get("id")
     except Exception as e:
         logger.error(f"Error sending proactive message: {e}")
-        return False, str(e)
+        return False, str(e), None
 
 
 # ============================================================================
 # AIRCALL WEBHOOK PROCESSING (background thread)
 # ============================================================================
 
-def process_aircall_call(call_meta: dict):
+async def process_aircall_call(call_meta: dict):
     """
     Background worker: download recording, transcribe, run through Gemini pipeline.
-    Called in a separate thread so the webhook can return 200 immediately.
+    Runs as a CALL_POOL worker task on the server's event loop so the webhook can
+    return 200 immediately. Network waits are awaited; blocking Sheets, file and
+    SQLite (job store, dedup, artifacts) I/O is pushed to threads.
+
+    Each stage is checkpointed in the job store, so a job resumed after a restart
+    skips the stages (and the transcription/Gemini spend) it already completed.
+    Stage outputs are also kept in the artifact store, which outlives the job,
+    so a retried call resumes at its first missing artifact.
     """
     call_id = call_meta["call_id"]
     source_label = f"Aircall call {call_id}"
 
+    job = await asyncio.to_thread(job_store.get_job, call_id)
+    if job is None:
+        job = await asyncio.to_thread(job_store.save_new_job, call_meta)
+    call_meta = job["call_meta"]
+    state = job["state"]
+    # Set by /retry?force=true (kept in the job, so a resumed job still honours it)
+    force_reprocess = call_meta.pop("force_reprocess", False)
+    await asyncio.to_thread(job_store.mark_started, call_id)
+    if job["stage"]:
+        logger.info(f"Resuming call {call_id} after stage '{job['stage']}'")
+
     try:
         # 0. If recording wasn't ready at webhook time, poll for it
-        if call_meta.get("recording_pending"):
+        if call_meta.get("recording_pending") and not job_store.stage_done(job, "download"):
             logger.info(f"Recording pending for call {call_id} — polling Aircall API...")
-            updated = aircall_handler.poll_for_recording(call_id)
+            updated = await aircall_handler.poll_for_recording(call_id)
             if not updated:
                 logger.info(f"No recording found after polling for call {call_id} — skipping")
+                await asyncio.to_thread(job_store.finish, call_id, job_store.SKIPPED, "No recording")
                 return
             call_meta = updated
+            await asyncio.to_thread(job_store.update_call_meta, call_id, call_meta)
 
-        # 1. Initialize Google Sheets
-        sheets_service = processor.get_google_services()
+        await asyncio.to_thread(artifact_store.save, call_id, "call_meta", call_meta, call_meta["call_date"])
 
-        # 2. Load consultants
-        consultants = processor.get_consultants(sheets_service)
-        logger.info(f"Loaded {len(consultants)} consultants")
+        # 1. Sheets reads come from the cached directory/prompts; audit rows go
+        #    through the write-behind audit log, so no per-call Sheets service is needed
+        sheets_service = None
 
-        # 3. Find consultant by Aircall user ID first, then by name
-        consultant, consultant_name = processor.find_consultant_by_aircall_id(
-            call_meta["aircall_user_id"], consultants
-        )
+        # 2-3. Find consultant by Aircall user ID first, then by name
+        if job_store.stage_done(job, "lookup"):
+            consultant, consultant_name = state["consultant"], state["consultant_name"]
+        else:
+            consultants = await consultant_directory.get_consultants()
 
-        if not consultant and call_meta["user_name"]:
-            consultant, consultant_name = processor.find_consultant_by_name(
-                call_meta["user_name"], consultants
+            consultant, consultant_name = processor.find_consultant_by_aircall_id(
+                call_meta["aircall_user_id"], consultants
             )
 
-        if not consultant:
-            logger.warning(f"No consultant found for Aircall user {call_meta['aircall_user_id']} "
-                           f"({call_meta['user_name']}) — skipping call {call_id}")
-            processor.log_skipped_call(
-                sheets_service, source_label, 0,
-                f"Unknown consultant (Aircall ID: {call_meta['aircall_user_id']}, name: {call_meta['user_name']})"
-            )
-            return
+            if not consultant and call_meta["user_name"]:
+                consultant, consultant_name = processor.find_consultant_by_name(
+                    call_meta["user_name"], consultants
+                )
+
+            if not consultant:
+                logger.warning(f"No consultant found for Aircall user {call_meta['aircall_user_id']} "
+                               f"({call_meta['user_name']}) — skipping call {call_id}")
+                processor.log_skipped_call(
+                    sheets_service, source_label, 0,
+                    f"Unknown consultant (Aircall ID: {call_meta['aircall_user_id']}, name: {call_meta['user_name']})"
+                )
+                await asyncio.to_thread(job_store.finish, call_id, job_store.SKIPPED, "Unknown consultant")
+                return
 
-        logger.info(f"Matched consultant: {consultant_name} (desk: {consultant['Desk']})")
+            await asyncio.to_thread(job_store.checkpoint, call_id, "lookup", consultant=consultant, consultant_name=consultant_name)
 
-        # 4. Download recording
-        audio_content = aircall_handler.download_recording(call_meta["recording_url"])
+        logger.info(f"Matched consultant: {consultant_name} (desk: {consultant['Desk']})")
 
-        # 5. Transcribe
-        logger.info(f"Transcribing call {call_id}...")
-        transcript = aircall_handler.transcribe_audio(audio_content, duration_seconds=call_meta.get("duration", 0))
-        logger.info(f"Transcription complete: {processor.count_words(transcript)} words")
+        # 4-5. Download and transcribe — skipped if a stored transcript survives from an earlier attempt
+        if job_store.stage_done(job, "transcribe"):
+            transcript = state["transcript"]
+        else:
+            transcript = await asyncio.to_thread(artifact_store.load, call_id, "transcript")
+            if transcript is not None:
+                logger.info(f"Reusing stored transcript for call {call_id}")
+                await asyncio.to_thread(job_store.checkpoint, call_id, "transcribe", transcript=transcript)
+            else:
+                transcript = await _download_and_transcribe(call_id, call_meta, job)
+                await asyncio.to_thread(artifact_store.save, call_id, "transcript", transcript)
 
         # 6. Determine candidate name — use contact name, fall back to phone number
         candidate_name = call_meta["contact_name"] or call_meta["caller_number"] or "Unknown caller"
 
         # 7. Hand off to the shared Gemini + delivery pipeline
-        processor.process_transcript(
-            transcript=transcript,
-            consultant=consultant,
-            consultant_name=consultant_name,
-            candidate_name=candidate_name,
-            call_date=call_meta["call_date"],
-            source_label=source_label,
-            sheets_service=sheets_service,
+        activity_id = None
+        card = None
+        prompts = None
+        if job_store.stage_done(job, "gemini"):
+            card = state["card"]
+            activity_id = state.get("activity_id")
+        else:
+            # A stored card is reused only if the current prompt and route would produce it again
+            stored = await asyncio.to_thread(artifact_store.load, call_id, "card")
+            if stored is not None:
+                prompts = await prompt_cache.get_prompts()
+                if prompts.is_current(consultant["Desk"], processor.count_words(transcript),
+                                      stored.get("prompt_version"), stored.get("route")):
+                    logger.info(f"Reusing stored card for call {call_id}")
+                    card = stored["card"]
+                    await asyncio.to_thread(job_store.checkpoint, call_id, "gemini", card=card,
+                                            prompt_version=stored["prompt_version"], route=stored["route"])
+                else:
+                    logger.info(f"Stored card for call {call_id} predates the current prompt or routing — regenerating")
+
+        if card is None:
+            # Gemini is down — wait out the breaker without holding a worker
+            retry_in = processor.gemini_retry_in()
+            if retry_in > 0:
+                park_call(call_id, call_meta, retry_in)
+                return
+
+            note = await processor.generate_call_note(
+                transcript=transcript,
+                consultant=consultant,
+                consultant_name=consultant_name,
+                candidate_name=candidate_name,
+                call_date=call_meta["call_date"],
+                source_label=source_label,
+                sheets_service=sheets_service,
+                prompts=prompts or await prompt_cache.get_prompts(),
+                stream=True,
+                bypass_cache=force_reprocess,
+            )
+            if note is None:
+                await asyncio.to_thread(job_store.finish, call_id, job_store.SKIPPED)
+                return
+            card = note["card"]
+            activity_id = note["activity_id"]
+            await asyncio.to_thread(_save_note_artifacts, call_id, note)
+            await asyncio.to_thread(job_store.checkpoint, call_id, "gemini", card=card,
+                                    prompt_version=note["prompt_version"],
+                                    activity_id=activity_id, route=note["route"])
+
+        delivered = await processor.deliver_call_note(
+            card, consultant, consultant_name,
+            processor.count_words(transcript), source_label, sheets_service,
+            activity_id=activity_id,
         )
+        await asyncio.to_thread(job_store.checkpoint, call_id, "deliver", delivered=delivered)
+        await asyncio.to_thread(job_store.finish, call_id, job_store.DONE if delivered else job_store.SKIPPED)
 
+    except retry_policy.CircuitOpenError as e:
+        park_call(call_id, call_meta, e.retry_in)
     except Exception as e:
         import traceback
         logger.error(f"Error processing Aircall call {call_id}: {e}")
         logger.error(traceback.format_exc())
-        try:
-            sheets_service = processor.get_google_services()
-            processor.log_processing_error(sheets_service, source_label, str(e), "process_aircall_call")
-        except Exception:
-            pass
+        await asyncio.to_thread(job_store.finish, call_id, job_store.FAILED, str(e))
+        await asyncio.to_thread(dedup.forget, call_id)  # let a webhook retry or /retry pick it up again
+        processor.log_processing_error(None, source_label, str(e), "process_aircall_call")
+
+
+async def _download_and_transcribe(call_id: str, call_meta: dict, job: dict) -> str:
+    """Download (checkpointed to disk) and transcribe a call's recording. Returns the transcript."""
+    recording_path = job_store.recording_path(call_id)
+    needs_download = not job_store.stage_done(job, "download") or not os.path.exists(recording_path)
+    if needs_download:
+        # Streamed to disk (resumes a .part left by an interrupted attempt)
+        recording = await aircall_handler.download_recording(call_meta["recording_url"], recording_path)
+        await asyncio.to_thread(job_store.checkpoint, call_id, "download")
+    else:
+        recording = await asyncio.to_thread(open, recording_path, "rb")
+
+    logger.info(f"Transcribing call {call_id}...")
+    try:
+        transcription = await aircall_handler.transcribe_audio(recording, duration_seconds=call_meta.get("duration", 0))
+    finally:
+        recording.close()
+    transcript = transcription.text
+    logger.info(f"Transcription complete: {processor.count_words(transcript)} words")
+    await asyncio.to_thread(job_store.checkpoint, call_id, "transcribe", transcript=transcript,
+                            trimmed_seconds=transcription.trimmed_seconds)
+    _remove_file(recording_path)
+    return transcript
+
+
+def _save_note_artifacts(call_id: str, note: dict):
+    """Store the rendered prompt, Gemini notes and card (with the prompt version and route behind it)."""
+    artifact_store.save(call_id, "prompt", note["prompt"])
+    artifact_store.save(call_id, "notes", note["notes"])
+    artifact_store.save(call_id, "card", {"card": note["card"], "prompt_version": note["prompt_version"],
+                                          "route": note["route"]})
+
+
+def _remove_file(path: str):
+    """Delete a checkpointed file, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def resume_pending_jobs():
+    """Re-queue jobs left unfinished by the previous process (e.g. a redeploy)."""
+    jobs = job_store.pending_jobs()
+    if not jobs:
+        return
+
+    logger.info(f"Resuming {len(jobs)} unfinished call jobs")
+    for job in jobs:
+        if CALL_POOL.submit(job["call_meta"]) == worker_pool.SHED:
+            # Queue and backlog full — free the call for a webhook retry or /retry
+            job_store.finish(job["call_id"], job_store.SHED)
+            dedup.forget(job["call_id"])
+            logger.warning(f"Job queue full — shedding resumed call {job['call_id']}")
+
+
+# How often expired artifacts, finished jobs and orphaned recordings are purged
+DATA_PURGE_INTERVAL_SECONDS = int(os.environ.get("DATA_PURGE_INTERVAL_SECONDS", str(6 * 3600)))
+
+
+async def run_janitor():
+    """Background task: enforce data retention now and every DATA_PURGE_INTERVAL_SECONDS."""
+    while True:
+        for purge in (artifact_store.purge_expired, job_store.purge_expired, aircall_handler.purge_expired,
+                      processor.purge_expired_gemini_cache):
+            try:
+                await asyncio.to_thread(purge)
+            except Exception as e:
+                logger.error(f"Retention purge failed ({purge.__module__}): {e}")
+        await asyncio.sleep(DATA_PURGE_INTERVAL_SECONDS)
+
+
+# Fixed-size pool so a burst of webhooks can't start unbounded concurrent calls
+CALL_POOL = worker_pool.WorkerPool(process_aircall_call, name="call-worker")
+
+# Calls waiting for the Gemini circuit breaker to let calls through (call_id -> call_meta).
+# They stay pending in the job store with their checkpoints, so a restart resumes them too.
+PARKED_CALLS = {}
+PARKED_CALL_CHECK_SECONDS = float(os.environ.get("PARKED_CALL_CHECK_SECONDS", "5"))
+
+
+def park_call(call_id: str, call_meta: dict, retry_in: float):
+    """Set a call aside until Gemini is available again."""
+    PARKED_CALLS[call_id] = call_meta
+    logger.warning(f"Gemini unavailable — parked call {call_id} for ~{retry_in:.0f}s "
+                   f"({len(PARKED_CALLS)} parked)")
+
+
+async def run_parked_call_releaser():
+    """
+    Background task: resubmit parked calls once the Gemini breaker allows calls.
+    While it is half-open only one call is released (the probe); once closed, all are.
+    """
+    while True:
+        await asyncio.sleep(PARKED_CALL_CHECK_SECONDS)
+        if not PARKED_CALLS or processor.gemini_retry_in() > 0:
+            continue
+
+        release_all = processor.gemini_breaker_stats()["state"] == retry_policy.CLOSED
+        for call_id in list(PARKED_CALLS):
+            if CALL_POOL.submit(PARKED_CALLS[call_id]) == worker_pool.SHED:
+                break  # queue full — try again next tick
+            del PARKED_CALLS[call_id]
+            logger.info(f"Released parked call {call_id}")
+            if not release_all:
+                break
 
 
 # ============================================================================
@@ -418,8 +696,9 @@ async def aircall_webhook(req: web.Request) -> web.Response:
     1. Validate the webhook payload
     2. Extract call metadata (recording URL, user ID, caller info)
     3. Return 200 immediately (Aircall expects fast response)
-    4. Process in background thread (download → transcribe → Gemini → Teams)
+    4. Queue for the worker pool (download → transcribe → Gemini → Teams)
     """
+    claimed_id = None
     try:
         # Read raw body for signature verification
         raw_body = await req.read()
@@ -445,49 +724,95 @@ async def aircall_webhook(req: web.Request) -> web.Response:
             f"(user: {call_meta['user_name']}, duration: {call_meta['duration']}s)"
         )
 
-        # Process in background thread so we can return 200 fast
-        thread = threading.Thread(
-            target=process_aircall_call,
-            args=(call_meta,),
-            daemon=True,
-        )
-        thread.start()
-
-        return web.json_response({"status": "accepted", "call_id": call_meta["call_id"]}, status=200)
+        # Aircall retries webhooks — acknowledge duplicates without starting any work
+        if not await asyncio.to_thread(dedup.claim, call_meta["call_id"]):
+            logger.info(f"Duplicate webhook for call {call_meta['call_id']} — ignored")
+            return web.json_response({"status": "duplicate", "call_id": call_meta["call_id"]}, status=200)
+        claimed_id = call_meta["call_id"]
+
+        # Persist on receipt, then hand off to the worker pool so we can return 200 fast
+        await asyncio.to_thread(job_store.save_new_job, call_meta)
+        outcome = CALL_POOL.submit(call_meta)
+        if outcome == worker_pool.SHED:
+            # Queue and backlog full — let Aircall retry later
+            await asyncio.to_thread(job_store.finish, call_meta["call_id"], job_store.SHED)
+            await asyncio.to_thread(dedup.forget, call_meta["call_id"])
+            logger.warning(f"Job queue full — shedding call {call_meta['call_id']}")
+            return web.json_response({"status": "busy", "call_id": call_meta["call_id"]}, status=503)
+
+        claimed_id = None  # queued — the worker owns the claim now
+        return web.json_response({"status": "accepted", "call_id": call_meta["call_id"], "queue": outcome}, status=200)
 
     except json.JSONDecodeError:
         logger.error("Aircall webhook: invalid JSON")
         return web.Response(status=400, text="Invalid JSON")
     except Exception as e:
         logger.error(f"Aircall webhook error: {e}")
+        if claimed_id is not None:
+            # Release the claim so Aircall's retry of this webhook isn't dropped as a duplicate
+            await asyncio.to_thread(dedup.forget, claimed_id)
         return web.Response(status=500, text="Internal error")
 
 
 async def retry_call(req: web.Request) -> web.Response:
-    """Re-fetch a call from Aircall API and reprocess it."""
+    """
+    Reprocess a call from its first missing artifact (re-fetching it from the Aircall API
+    unless a transcript is already stored).
+    Calls already processed are acknowledged as duplicates unless ?force=true is given;
+    forcing also discards the stored prompt, notes and card and bypasses the Gemini
+    cache, so the stored transcript is run through Gemini again.
+    """
     call_id = req.match_info["call_id"]
+    force = req.query.get("force", "").lower() == "true"
     try:
-        call_meta = aircall_handler.fetch_call(call_id)
+        job = await asyncio.to_thread(job_store.get_job, call_id)
+        if job and job["status"] == job_store.PENDING:
+            return web.json_response({"status": "in_progress", "call_id": call_id}, status=409)
+
+        if not await asyncio.to_thread(dedup.claim, call_id, force=force):
+            return web.json_response({
+                "status": "duplicate",
+                "call_id": call_id,
+                "hint": "Call already processed — add ?force=true to reprocess",
+            }, status=200)
+
+        if force:
+            await asyncio.to_thread(artifact_store.delete, call_id, "prompt", "notes", "card")
+
+        # With a stored transcript the recording (and a fresh pre-signed URL) isn't needed
+        resume_from = await asyncio.to_thread(artifact_store.first_missing, call_id)
+        call_meta = None
+        if resume_from not in ("call_meta", "transcript"):
+            call_meta = await asyncio.to_thread(artifact_store.load, call_id, "call_meta")
+        if call_meta is None:
+            resume_from = "call_meta"
+            call_meta = await aircall_handler.fetch_call(call_id)
         if not call_meta:
+            await asyncio.to_thread(dedup.forget, call_id)
             return web.json_response({"error": "No recording found for that call"}, status=404)
 
-        logger.info(f"Retry: reprocessing call {call_id} (user: {call_meta['user_name']}, duration: {call_meta['duration']}s)")
+        logger.info(f"Retry: reprocessing call {call_id} from '{resume_from or 'deliver'}' "
+                    f"(user: {call_meta['user_name']}, duration: {call_meta['duration']}s)")
 
-        thread = threading.Thread(
-            target=process_aircall_call,
-            args=(call_meta,),
-            daemon=True,
-        )
-        thread.start()
+        if force:
+            call_meta = dict(call_meta, force_reprocess=True)
+        await asyncio.to_thread(job_store.save_new_job, call_meta)
+        outcome = CALL_POOL.submit(call_meta)
+        if outcome == worker_pool.SHED:
+            await asyncio.to_thread(job_store.finish, call_id, job_store.SHED)
+            await asyncio.to_thread(dedup.forget, call_id)
+            return web.json_response({"error": "Job queue full, try again later"}, status=503)
 
-        return web.json_response({"status": "accepted", "call_id": call_id, "user": call_meta["user_name"]}, status=200)
+        return web.json_response({"status": "accepted", "call_id": call_id, "user": call_meta["user_name"],
+                                  "resume_from": resume_from or "deliver", "queue": outcome}, status=200)
     except Exception as e:
         logger.error(f"Retry failed for call {call_id}: {e}")
+        await asyncio.to_thread(dedup.forget, call_id)
         return web.json_response({"error": str(e)}, status=500)
 
 
 async def api_send_note(req: web.Request) -> web.Response:
-    """API endpoint to send a call note to a user."""
+    """API endpoint for external callers to send a call note to a user (the pipeline delivers in-process)."""
     try:
         data = await req.json()
         user_aad_id = data.get('user_aad_id')
@@ -508,6 +833,30 @@ async def api_send_note(req: web.Request) -> web.Response:
         return web.json_response({"error": str(e)}, status=500)
 
 
+async def admin_reload_consultants(req: web.Request) -> web.Response:
+    """Force an immediate reload of the cached consultant directory."""
+    try:
+        refreshed = await consultant_directory.reload()
+    except Exception as e:
+        logger.error(f"Consultant reload failed: {e}")
+        return web.json_response({"error": str(e)}, status=502)
+
+    status = 200 if refreshed else 502
+    return web.json_response({"refreshed": refreshed, **consultant_directory.stats()}, status=status)
+
+
+async def admin_reload_prompts(req: web.Request) -> web.Response:
+    """Force an immediate re-check of the Prompts sheet."""
+    try:
+        refreshed = await prompt_cache.reload()
+    except Exception as e:
+        logger.error(f"Prompt reload failed: {e}")
+        return web.json_response({"error": str(e)}, status=502)
+
+    status = 200 if refreshed else 502
+    return web.json_response({"refreshed": refreshed, **prompt_cache.stats()}, status=status)
+
+
 async def api_list_users(req: web.Request) -> web.Response:
     """List registered users."""
     return web.json_response({
@@ -520,12 +869,35 @@ _START_TIME = datetime.now().isoformat()
 
 async def health(req: web.Request) -> web.Response:
     """Health check endpoint."""
+    # These read SQLite, which can wait behind a purge or a write — keep them off the loop
+    jobs, dedup_stats, transcription, gemini_cache, artifacts = await asyncio.gather(
+        asyncio.to_thread(job_store.counts),
+        asyncio.to_thread(dedup.stats),
+        asyncio.to_thread(aircall_handler.transcription_stats),
+        asyncio.to_thread(processor.gemini_cache_stats),
+        asyncio.to_thread(artifact_store.stats),
+    )
     return web.json_response({
         "status": "healthy",
         "bot_id": BOT_APP_ID,
         "registered_users": len(CONVERSATION_REFERENCES),
         "input_source": "aircall_webhooks",
         "started_at": _START_TIME,
+        "worker_pool": CALL_POOL.stats(),
+        "jobs": jobs,
+        "dedup": dedup_stats,
+        "consultant_directory": consultant_directory.stats(),
+        "prompts": prompt_cache.stats(),
+        "audit_log": audit_log.stats(),
+        "conversation_references": conversation_reference_stats(),
+        "event_loop": loop_monitor.stats(),
+        "http_clients": http_clients.stats(),
+        "transcription": transcription,
+        "transcript_compaction": transcript_compaction.stats(),
+        "gemini_cache": gemini_cache,
+        "model_routing": model_router.stats(),
+        "gemini_breaker": {**processor.gemini_breaker_stats(), "parked_calls": len(PARKED_CALLS)},
+        "artifacts": artifacts,
     })
 
 
@@ -554,6 +926,34 @@ def run_processor_loop():
 # MAIN
 # ============================================================================
 
+async def on_startup(app: web.Application):
+    """Start call workers on the server's event loop and pick up anything a redeploy interrupted."""
+    # The pipeline runs on this loop too, so it can drive the adapter directly
+    processor.register_card_sender(send_proactive_card, updater=send_or_update_proactive_card)
+    CALL_POOL.start()
+    resume_pending_jobs()
+    app["consultant_refresher"] = asyncio.create_task(consultant_directory.run_refresher())
+    app["prompt_refresher"] = asyncio.create_task(prompt_cache.run_refresher())
+    app["conversation_reference_writer"] = asyncio.create_task(run_conversation_reference_writer())
+    app["loop_monitor"] = asyncio.create_task(loop_monitor.run())
+    app["janitor"] = asyncio.create_task(run_janitor())
+    app["parked_call_releaser"] = asyncio.create_task(run_parked_call_releaser())
+
+
+async def on_cleanup(app: web.Application):
+    """Stop background tasks and close the shared HTTP connection pool."""
+    app["consultant_refresher"].cancel()
+    app["prompt_refresher"].cancel()
+    app["conversation_reference_writer"].cancel()
+    app["loop_monitor"].cancel()
+    app["janitor"].cancel()
+    app["parked_call_releaser"].cancel()
+    await CALL_POOL.stop()
+    await http_clients.close()
+    await asyncio.to_thread(audit_log.flush)
+    await asyncio.to_thread(flush_conversation_references)
+
+
 def main():
     """Main entry point."""
     PORT = int(os.environ.get("PORT", 3978))
@@ -570,10 +970,14 @@ def main():
 
     # Create and run web app
     app = web.Application()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
     app.router.add_post("/api/messages", messages)
     app.router.add_post("/api/send-note", api_send_note)
     app.router.add_post("/webhooks/aircall", aircall_webhook)
     app.router.add_get("/retry/{call_id}", retry_call)
+    app.router.add_post("/admin/reload-consultants", admin_reload_consultants)
+    app.router.add_post("/admin/reload-prompts", admin_reload_prompts)
     app.router.add_get("/api/users", api_list_users)
     app.router.add_get("/health", health)
     app.router.add_get("/", health)
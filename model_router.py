@@ -0,0 +1,137 @@
+"""
+Model Routing
+Picks the Gemini model and generation settings for each call from its word
+count, the consultant's desk and the configured latency target
+(GEMINI_LATENCY_TARGET), so a short check-in goes to a fast model and a long
+interview to Pro.
+
+Rules are edited in the Model_Routing tab next to Prompts and reloaded with
+the prompts by prompt_cache. One rule per row, first match wins:
+
+    Route | Desk | Min Words | Max Words | Latency Target | Model | Max Output Tokens | Temperature
+
+Blank Desk, word-count and Latency Target cells match anything; Desk and
+Latency Target may list several values ("fast, balanced"). Without the tab
+the built-in rules below apply. Latency and estimated tokens per route are
+kept for /health so tiers can be compared.
+"""
+
+import os
+import logging
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-pro")
+GEMINI_FAST_MODEL = os.environ.get("GEMINI_FAST_MODEL", "gemini-2.5-flash")
+GEMINI_FAST_MAX_WORDS = int(os.environ.get("GEMINI_FAST_MAX_WORDS", "1500"))
+GEMINI_LATENCY_TARGET = os.environ.get("GEMINI_LATENCY_TARGET", "balanced").strip().lower()  # fast | balanced | quality
+
+DEFAULT_MAX_OUTPUT_TOKENS = 8000
+DEFAULT_TEMPERATURE = 0.1
+
+_HEADER = ("route", "desk", "min words", "max words", "latency target", "model", "max output tokens", "temperature")
+
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+class Route(NamedTuple):
+    name: str
+    model: str
+    max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS
+    temperature: float = DEFAULT_TEMPERATURE
+
+    def generation_config(self) -> Dict[str, Any]:
+        return {"temperature": self.temperature, "maxOutputTokens": self.max_output_tokens}
+
+
+class Rule(NamedTuple):
+    route: Route
+    desks: FrozenSet[str] = frozenset()  # lower-case; empty matches any desk
+    min_words: int = 0
+    max_words: Optional[int] = None
+    latency_targets: FrozenSet[str] = frozenset()  # empty matches any target
+
+    def matches(self, desk: str, word_count: int, latency_target: str) -> bool:
+        return ((not self.desks or (desk or '').strip().lower() in self.desks)
+                and word_count >= self.min_words
+                and (self.max_words is None or word_count <= self.max_words)
+                and (not self.latency_targets or latency_target in self.latency_targets))
+
+
+DEFAULT_ROUTE = Route("pro", GEMINI_MODEL)
+
+# Short calls go to the fast model unless the latency target asks for quality
+DEFAULT_RULES = [
+    Rule(Route("fast", GEMINI_FAST_MODEL), max_words=GEMINI_FAST_MAX_WORDS,
+         latency_targets=frozenset({"fast", "balanced"})),
+    Rule(DEFAULT_ROUTE),
+]
+
+
+def _values(cell: str) -> FrozenSet[str]:
+    return frozenset(v.strip().lower() for v in cell.split(",") if v.strip())
+
+
+def parse_rules(rows: List[List[str]]) -> List[Rule]:
+    """Build rules from Model_Routing rows (header optional). Invalid rows are logged and skipped."""
+    rules = []
+    for row in rows:
+        cells = [str(c).strip() for c in row] + [''] * (len(_HEADER) - len(row))
+        if not any(cells) or cells[0].lower() == _HEADER[0]:
+            continue
+        name, desk, min_words, max_words, target, model, max_tokens, temperature = cells[:len(_HEADER)]
+        try:
+            route = Route(
+                name or model,
+                model or GEMINI_MODEL,
+                int(max_tokens) if max_tokens else DEFAULT_MAX_OUTPUT_TOKENS,
+                float(temperature) if temperature else DEFAULT_TEMPERATURE,
+            )
+            rules.append(Rule(
+                route,
+                _values(desk),
+                int(min_words) if min_words else 0,
+                int(max_words) if max_words else None,
+                _values(target),
+            ))
+        except ValueError as e:
+            logger.warning(f"Skipping invalid Model_Routing row {row}: {e}")
+    return rules
+
+
+class ModelRouter:
+    """Ordered routing rules; the first rule matching a call picks its route."""
+
+    def __init__(self, rows: Optional[List[List[str]]] = None):
+        self.rules = parse_rules(rows or []) or DEFAULT_RULES
+
+    def route(self, desk: str, word_count: int, latency_target: str = GEMINI_LATENCY_TARGET) -> Route:
+        for rule in self.rules:
+            if rule.matches(desk, word_count, latency_target):
+                return rule.route
+        return DEFAULT_ROUTE
+
+
+def record(route: Route, seconds: float, tokens_in: int, tokens_out: int):
+    """Count one (uncached) Gemini call against its route."""
+    entry = _stats.setdefault(route.name, {"model": route.model, "calls": 0, "seconds": 0.0,
+                                           "tokens_in": 0, "tokens_out": 0})
+    entry["model"] = route.model
+    entry["calls"] += 1
+    entry["seconds"] += seconds
+    entry["tokens_in"] += tokens_in
+    entry["tokens_out"] += tokens_out
+
+
+def stats() -> Dict[str, Any]:
+    """Latency target and per-route call counts, average latency and estimated tokens (for /health)."""
+    routes = {}
+    for name, entry in _stats.items():
+        routes[name] = dict(
+            entry,
+            seconds=round(entry["seconds"], 1),
+            avg_seconds=round(entry["seconds"] / entry["calls"], 2) if entry["calls"] else None,
+        )
+    return {"latency_target": GEMINI_LATENCY_TARGET, "routes": routes}
@@ -0,0 +1,336 @@
+"""
+MP3 Splitter
+Cuts an MP3 into chunks at frame boundaries without decoding or re-encoding.
+
+Frame headers are parsed straight from the compressed stream (the file is
+mmapped, so it is never fully loaded into memory) and chunks are written as
+byte ranges of whole frames, each within a duration and a size limit.
+Consecutive chunks overlap by a few frames so a word cut at a boundary is
+heard whole in at least one of them. Any leading Xing/Info/VBRI header frame
+is dropped because its length fields describe the whole file.
+
+Given silence ranges (see audio_prep.detect_silences), chunk boundaries are
+moved into pauses and, optionally, long silences are cut out by dropping
+their frames. The returned time map records which stretches of the original
+recording were kept (the caller reports how much was trimmed from it).
+
+Run as a script to compare against the pydub decode/re-encode path:
+    python mp3_splitter.py recording.mp3
+"""
+
+import io
+import os
+import mmap
+import bisect
+import logging
+from typing import List, NamedTuple, Optional, Tuple, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+# Bitrates in kbps by (MPEG-1?, layer)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class Frame(NamedTuple):
+    offset: int
+    length: int
+    duration_ms: float
+
+
+class Chunk(NamedTuple):
+    path: str
+    start_ms: float
+    end_ms: float
+
+
+class TimeSegment(NamedTuple):
+    """A run of kept audio: output_ms in the trimmed audio starts at source_ms in the original."""
+    output_ms: float
+    source_ms: float
+    duration_ms: float
+
+
+def _parse_header(buf, pos: int) -> Optional[Tuple[int, float]]:
+    """Parse the 4-byte frame header at pos. Returns (frame length, duration in ms) or None."""
+    if buf[pos] != 0xFF or buf[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2 = buf[pos + 1], buf[pos + 2]
+    version = (b1 >> 3) & 3
+    layer = 4 - ((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # reserved values, or free-format bitrate (not supported)
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 1
+
+    if layer == 1:
+        length, samples = (12 * bitrate // sample_rate + padding) * 4, 384
+    elif layer == 2:
+        length, samples = 144 * bitrate // sample_rate + padding, 1152
+    elif mpeg1:
+        length, samples = 144 * bitrate // sample_rate + padding, 1152
+    else:
+        length, samples = 72 * bitrate // sample_rate + padding, 576
+    return length, samples * 1000 / sample_rate
+
+
+def _id3v2_size(buf) -> int:
+    """Length of a leading ID3v2 tag (0 if there is none)."""
+    if len(buf) < 10 or buf[0:3] != b"ID3":
+        return 0
+    size = (buf[6] & 0x7F) << 21 | (buf[7] & 0x7F) << 14 | (buf[8] & 0x7F) << 7 | (buf[9] & 0x7F)
+    footer = 10 if buf[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_vbr_header(buf, frame: Frame) -> bool:
+    """True if the frame is a Xing/Info/VBRI metadata frame rather than audio."""
+    head = bytes(buf[frame.offset:frame.offset + min(frame.length, 64)])
+    return b"Xing" in head or b"Info" in head or b"VBRI" in head
+
+
+def scan_frames(buf) -> List[Frame]:
+    """Walk the MPEG audio frames in buf, resyncing past junk or damaged frames."""
+    pos = _id3v2_size(buf)
+    end = len(buf)
+    if end >= 128 and buf[end - 128:end - 125] == b"TAG":
+        end -= 128  # ID3v1 trailer
+
+    frames = []
+    synced = False
+    while pos + 4 <= end:
+        header = _parse_header(buf, pos)
+        if header is not None and pos + header[0] <= end:
+            next_pos = pos + header[0]
+            # After losing sync, only trust a header that is followed by another one
+            if synced or next_pos + 4 > end or _parse_header(buf, next_pos) is not None:
+                frames.append(Frame(pos, header[0], header[1]))
+                pos = next_pos
+                synced = True
+                continue
+        synced = False
+        pos = buf.find(b"\xff", pos + 1, end)
+        if pos < 0:
+            break
+
+    if frames and _is_vbr_header(buf, frames[0]):
+        frames.pop(0)
+    return frames
+
+
+def speech_segments(silences: List[Tuple[float, float]], total_ms: float, min_silence_ms: float,
+                    keep_ms: float) -> List[Tuple[float, float]]:
+    """
+    Source time ranges to keep: everything except silences longer than
+    min_silence_ms, leaving keep_ms of quiet either side of each cut.
+    """
+    segments = []
+    pos = 0.0
+    for start, end in silences:
+        if end - start < min_silence_ms:
+            continue
+        cut_start, cut_end = start + keep_ms, end - keep_ms
+        if cut_end <= cut_start or cut_end <= pos:
+            continue
+        if cut_start > pos:
+            segments.append((pos, cut_start))
+        pos = cut_end
+    if pos < total_ms:
+        segments.append((pos, total_ms))
+    return segments
+
+
+def _plan_chunks(frames: List[Frame], max_duration_ms: float, max_bytes: int, overlap_ms: float,
+                 pause_before: Optional[List[bool]] = None, pause_window_ms: float = 0) -> List[Tuple[int, int]]:
+    """
+    Group frames into [start, end) index ranges within both limits. A cut moves
+    back to a pause (pause_before[i]: a pause starts at frame i) within the last
+    pause_window_ms of the chunk; cuts that land mid-speech overlap by overlap_ms.
+    """
+    ranges = []
+    start = 0
+    while start < len(frames):
+        end, duration, size = start, 0.0, 0
+        while end < len(frames):
+            frame = frames[end]
+            if end > start and (duration + frame.duration_ms > max_duration_ms
+                                or size + frame.length > max_bytes):
+                break
+            duration += frame.duration_ms
+            size += frame.length
+            end += 1
+
+        if end < len(frames) and pause_before:
+            cut, back = end, 0.0
+            while cut - 1 > start and back < pause_window_ms and not pause_before[cut]:
+                cut -= 1
+                back += frames[cut].duration_ms
+            if pause_before[cut]:
+                ranges.append((start, cut))
+                start = cut
+                continue
+
+        ranges.append((start, end))
+        if end >= len(frames):
+            break
+
+        # Step back into the chunk just cut so the next one overlaps it
+        next_start, back = end, 0.0
+        while next_start - 1 > start and back < overlap_ms:
+            next_start -= 1
+            back += frames[next_start].duration_ms
+        start = next_start
+    return ranges
+
+
+def _open_buffer(audio_file: BinaryIO):
+    """mmap the file if it has a descriptor, else read it (small in-memory spools)."""
+    try:
+        fileno = audio_file.fileno()
+        if os.fstat(fileno).st_size == 0:
+            return b""
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        audio_file.seek(0)
+        return audio_file.read()
+
+
+def _select_frames(frames: List[Frame], starts: List[float], segments: List[Tuple[float, float]]) -> List[int]:
+    """Indexes of the frames whose midpoint falls inside one of the (sorted) segments."""
+    selected = []
+    s = 0
+    for i, frame in enumerate(frames):
+        middle = starts[i] + frame.duration_ms / 2
+        while s < len(segments) and segments[s][1] <= middle:
+            s += 1
+        if s == len(segments):
+            break
+        if segments[s][0] <= middle:
+            selected.append(i)
+    return selected
+
+
+def split_mp3(audio_file: BinaryIO, out_dir: str, max_duration_ms: float, max_bytes: int,
+              overlap_ms: float = 0, silences: Optional[List[Tuple[float, float]]] = None,
+              min_silence_ms: float = 0, keep_silence_ms: float = 0,
+              pause_window_ms: float = 0) -> Tuple[List[Chunk], List[TimeSegment]]:
+    """
+    Write frame-aligned chunks of audio_file to out_dir.
+
+    With silences (source (start_ms, end_ms) ranges, sorted), chunk boundaries
+    are moved into a pause where one falls within pause_window_ms of the limit,
+    and if min_silence_ms is set, silences longer than it are cut out (see
+    speech_segments).
+
+    Returns the chunks, in order, with times on the trimmed timeline, and the
+    kept segments (one covering the whole recording when nothing was cut).
+    Raises ValueError if no MPEG audio frames are found.
+    """
+    buf = _open_buffer(audio_file)
+    try:
+        all_frames = scan_frames(buf)
+        if not all_frames:
+            raise ValueError("No MPEG audio frames found")
+
+        source_starts = [0.0]
+        for frame in all_frames:
+            source_starts.append(source_starts[-1] + frame.duration_ms)
+
+        silences = silences or []
+        if silences and min_silence_ms:
+            segments = speech_segments(silences, source_starts[-1], min_silence_ms, keep_silence_ms)
+            selected = _select_frames(all_frames, source_starts, segments)
+        else:
+            selected = list(range(len(all_frames)))
+        if not selected:
+            raise ValueError("Recording is entirely silence")
+        frames = [all_frames[i] for i in selected]
+
+        # Output timeline, time map, and where pauses (trimmed gaps or detected silences) start
+        silence_starts = [start for start, _ in silences]
+        starts = [0.0]
+        time_map = []
+        pause_before = [False] * (len(frames) + 1)
+        for j, i in enumerate(selected):
+            if j == 0 or i != selected[j - 1] + 1:
+                time_map.append(TimeSegment(starts[j], source_starts[i], 0.0))
+                pause_before[j] = j > 0
+            else:
+                k = bisect.bisect_right(silence_starts, source_starts[i]) - 1
+                pause_before[j] = k >= 0 and source_starts[i] < silences[k][1]
+            starts.append(starts[j] + frames[j].duration_ms)
+            segment = time_map[-1]
+            time_map[-1] = segment._replace(duration_ms=starts[j + 1] - segment.output_ms)
+
+        chunks = []
+        view = memoryview(buf)
+        try:
+            ranges = _plan_chunks(frames, max_duration_ms, max_bytes, overlap_ms,
+                                  pause_before if silences else None, pause_window_ms)
+            for n, (start, end) in enumerate(ranges):
+                path = os.path.join(out_dir, f"chunk_{n}.mp3")
+                with open(path, "wb") as f:
+                    # Write runs of consecutive source frames as single slices
+                    run_start = start
+                    for j in range(start + 1, end + 1):
+                        if j == end or selected[j] != selected[j - 1] + 1:
+                            last = frames[j - 1]
+                            f.write(view[frames[run_start].offset:last.offset + last.length])
+                            run_start = j
+                chunks.append(Chunk(path, starts[start], starts[end]))
+        finally:
+            view.release()
+        return chunks, time_map
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import shutil
+    import resource
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    source = sys.argv[1]
+    chunk_ms = 20 * 60 * 1000
+    max_bytes = 24 * 1024 * 1024
+
+    def rss_mb():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    out_dir = tempfile.mkdtemp(prefix="mp3split_")
+    try:
+        started = time.perf_counter()
+        with open(source, "rb") as f:
+            chunks, _ = split_mp3(f, out_dir, chunk_ms, max_bytes, overlap_ms=2000)
+        print(f"frame splitter: {len(chunks)} chunks in {time.perf_counter() - started:.2f}s, "
+              f"peak RSS {rss_mb():.0f} MB")
+        for chunk in chunks:
+            print(f"  {os.path.basename(chunk.path)}: {chunk.start_ms / 1000:.1f}s - {chunk.end_ms / 1000:.1f}s, "
+                  f"{os.path.getsize(chunk.path) / (1024 * 1024):.1f} MB")
+
+        from pydub import AudioSegment
+        started = time.perf_counter()
+        audio = AudioSegment.from_mp3(source)
+        for i, start_ms in enumerate(range(0, len(audio), chunk_ms)):
+            audio[start_ms:start_ms + chunk_ms].export(os.path.join(out_dir, f"pydub_{i}.mp3"), format="mp3")
+        print(f"pydub decode/re-encode: {i + 1} chunks in {time.perf_counter() - started:.2f}s, "
+              f"peak RSS {rss_mb():.0f} MB")
+    finally:
+        shutil.rmtree(out_dir)
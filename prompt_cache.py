@@ -0,0 +1,74 @@
+"""
+Prompt Cache
+Process-wide cache of the desk prompts in the Prompts sheet, compiled once
+into PromptTemplates, together with the model routing rules in the
+Model_Routing tab.
+
+Refreshed in the background every PROMPT_CACHE_TTL_SECONDS. Each reload hashes
+the sheet content; templates are only recompiled (and the version bumped)
+when a prompt actually changed.
+"""
+
+import os
+import logging
+from typing import Dict, Any
+
+import call_notes_processor as processor
+from sheet_cache import SheetCache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PROMPT_CACHE_TTL_SECONDS = int(os.environ.get("PROMPT_CACHE_TTL_SECONDS", "300"))
+
+_changes = 0
+
+
+def _load(previous):
+    """Read the Prompts and Model_Routing tabs, recompiling only if their content hash changed (runs in a thread)."""
+    global _changes
+    sheets_service = processor.get_google_services()
+    prompts = processor.get_prompts(sheets_service)
+    routing_rows = processor.get_routing_rules(sheets_service)
+
+    version = processor.prompts_version(prompts, routing_rows)
+    if previous is not None and previous.version == version:
+        return previous
+
+    prompt_set = processor.PromptSet(prompts, routing_rows)
+    if previous is not None:
+        _changes += 1
+        logger.info(f"Desk prompts changed: version {previous.version} -> {prompt_set.version}")
+    else:
+        logger.info(f"Loaded {len(prompt_set)} desk prompts (version {prompt_set.version})")
+    return prompt_set
+
+
+_cache = SheetCache("Prompt cache", _load, PROMPT_CACHE_TTL_SECONDS)
+
+
+async def get_prompts() -> processor.PromptSet:
+    """Return the cached compiled prompts, loading them on first use."""
+    return await _cache.get()
+
+
+async def reload() -> bool:
+    """Reload the prompts now. Returns False if Sheets failed and the cached copy was kept."""
+    return await _cache.reload()
+
+
+async def run_refresher():
+    """Background task: re-check the Prompts sheet every TTL."""
+    await _cache.run_refresher()
+
+
+def stats() -> Dict[str, Any]:
+    """Prompt version, desk count and reload counters (for /health)."""
+    prompt_set = _cache.value
+    return dict(
+        _cache.stats(),
+        version=prompt_set.version if prompt_set is not None else None,
+        desks=len(prompt_set) if prompt_set is not None else 0,
+        routing_rules=len(prompt_set.router.rules) if prompt_set is not None else 0,
+        changes=_changes,
+    )
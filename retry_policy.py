@@ -0,0 +1,190 @@
+"""
+Retry Policy
+Shared retry rules for upstream APIs (currently Gemini).
+
+- classify() decides whether a failure is worth retrying: timeouts, dropped
+  connections, 408/429/5xx and malformed responses are; other 4xx and
+  PermanentError (e.g. a safety block) are not, since the same request will
+  fail the same way.
+- backoff_seconds() is exponential backoff with full jitter, so calls that
+  failed together don't retry together, and never shorter than a server's
+  Retry-After hint.
+- CircuitBreaker opens after consecutive retryable failures. While it is
+  open calls fail fast with CircuitOpenError instead of queueing more
+  requests behind an outage; after reset_seconds one probe call is let
+  through, and its result closes or re-opens the breaker.
+"""
+
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Closed: calls flow. Open: calls fail fast. Half-open: one probe call allowed.
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class PermanentError(Exception):
+    """A failure that retrying the same request won't fix."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit breaker open — retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class Decision(NamedTuple):
+    retryable: bool
+    retry_after: Optional[float]  # seconds the server asked us to wait, if it said
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds, or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(error: BaseException) -> Decision:
+    """
+    Decide whether a failed call should be retried. Errors carrying an HTTP
+    status (aiohttp.ClientResponseError or anything with .status) are judged by
+    it, and a retry_after attribute or Retry-After header is passed through.
+    """
+    if isinstance(error, PermanentError):
+        return Decision(False, None)
+
+    status = getattr(error, "status", None)
+    if not isinstance(status, int):
+        # Timeouts, dropped connections, truncated or malformed responses
+        return Decision(True, None)
+
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(error, "headers", None) or {}
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+    return Decision(status in RETRYABLE_STATUSES, retry_after)
+
+
+def backoff_seconds(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff for a 0-based attempt, at least retry_after."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by every caller of one upstream. Thread-safe."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_until = 0.0  # monotonic; 0 when closed
+        self._probe_started = None  # monotonic start of the half-open probe in flight
+        self._stats = {"opened": 0, "rejected": 0, "successes": 0, "failures": 0}
+        self._last_error = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if not self._opened_until:
+            return CLOSED
+        return OPEN if time.monotonic() < self._opened_until else HALF_OPEN
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe call through (0 unless open)."""
+        with self._lock:
+            return max(0.0, self._opened_until - time.monotonic()) if self._opened_until else 0.0
+
+    def before_call(self):
+        """Raise CircuitOpenError if a call shouldn't be made now."""
+        with self._lock:
+            state = self._state()
+            now = time.monotonic()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back (cancelled) expires
+                if self._probe_started is None or now - self._probe_started > self.reset_seconds:
+                    self._probe_started = now
+                    logger.info(f"{self.name} circuit breaker half-open — sending a probe call")
+                    return
+                retry_in = self.reset_seconds - (now - self._probe_started)
+            else:
+                retry_in = self._opened_until - now
+            self._stats["rejected"] += 1
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_until:
+                logger.info(f"{self.name} circuit breaker closed")
+            self._failures = 0
+            self._opened_until = 0.0
+            self._probe_started = None
+            self._stats["successes"] += 1
+
+    def record_failure(self, error: BaseException = None, retry_after: Optional[float] = None):
+        """Count a retryable failure; opens the breaker at the threshold or if a probe fails."""
+        with self._lock:
+            self._failures += 1
+            self._stats["failures"] += 1
+            self._last_error = str(error)[:200] if error is not None else None
+            if self._opened_until or self._failures >= self.failure_threshold:
+                self._open(max(self.reset_seconds, retry_after or 0.0))
+
+    def trip(self, seconds: float, error: BaseException = None):
+        """Open the breaker for at least `seconds` (e.g. a long Retry-After)."""
+        with self._lock:
+            self._last_error = str(error)[:200] if error is not None else self._last_error
+            self._open(max(self.reset_seconds, seconds))
+
+    def _open(self, seconds: float):
+        if self._state() != OPEN:
+            self._stats["opened"] += 1
+            logger.warning(f"{self.name} circuit breaker open for {seconds:.0f}s "
+                           f"after {self._failures} failures: {self._last_error}")
+        self._opened_until = max(self._opened_until, time.monotonic() + seconds)
+        self._probe_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and counters (for /health)."""
+        with self._lock:
+            state = self._state()
+            retry_in = max(0.0, self._opened_until - time.monotonic()) if state == OPEN else 0.0
+            return dict(
+                self._stats,
+                state=state,
+                consecutive_failures=self._failures,
+                retry_in_seconds=round(retry_in, 1),
+                failure_threshold=self.failure_threshold,
+                reset_seconds=self.reset_seconds,
+                last_error=self._last_error,
+            )
@@ -11,20 +11,16 @@ Run once after updating OAuth token with new scopes:
 """
 
 import os
-import json
 import time
-import base64
 import logging
-import requests
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+
+import http_clients
+import sheets_client
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
-GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE", "meraki-n8n-automation-66a9d5aafc1e.json")
-GOOGLE_SERVICE_ACCOUNT_JSON = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")
 GOOGLE_SPREADSHEET_ID = os.environ.get("GOOGLE_SPREADSHEET_ID", "1Z_5rhbhe4lW13t4DKOzhWW-cKLbeyneUHTZXBUmBM-g")
 
 MS_TENANT_ID = os.environ.get("MS_TENANT_ID", "")
@@ -45,25 +41,8 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 def get_sheets_service():
-    """Initialize Google Sheets service."""
-    scopes = ['https://www.googleapis.com/auth/spreadsheets']
-
-    if GOOGLE_SERVICE_ACCOUNT_JSON:
-        json_str = GOOGLE_SERVICE_ACCOUNT_JSON
-        try:
-            json_str = base64.b64decode(json_str).decode('utf-8')
-        except Exception:
-            pass
-        service_account_info = json.loads(json_str)
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info, scopes=scopes
-        )
-    else:
-        credentials = service_account.Credentials.from_service_account_file(
-            GOOGLE_SERVICE_ACCOUNT_FILE, scopes=scopes
-        )
-
-    return build('sheets', 'v4', credentials=credentials)
+    """Get the shared Google Sheets service (see sheets_client)."""
+    return sheets_client.get_sheets_service()
 
 
 def get_consultants(sheets_service):
@@ -143,7 +122,7 @@ class GraphClient:
             'scope': 'Chat.Create ChatMessage.Send ChannelMessage.Send Channel.Create Team.Create Team.ReadBasic.All ChannelMember.ReadWrite.All User.Read offline_access'
         }
 
-        response = requests.post(url, data=data)
+        response = http_clients.get_requests_session("graph").post(url, data=data)
         response.raise_for_status()
 
         tokens = response.json()
@@ -172,7 +151,7 @@ class GraphClient:
     def get_joined_teams(self):
         """Get teams the user has joined."""
         url = "https://graph.microsoft.com/v1.0/me/joinedTeams"
-        response = requests.get(url, headers=self._headers())
+        response = http_clients.get_requests_session("graph").get(url, headers=self._headers())
         response.raise_for_status()
         return response.json().get('value', [])
 
@@ -185,7 +164,7 @@ class GraphClient:
             "description": description
         }
 
-        response = requests.post(url, headers=self._headers(), json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=self._headers(), json=body)
 
         if response.status_code == 202:
             # Team creation is async - get team ID from location header
@@ -210,7 +189,7 @@ class GraphClient:
     def get_team_channels(self, team_id: str):
         """Get channels in a team."""
         url = f"https://graph.microsoft.com/v1.0/teams/{team_id}/channels"
-        response = requests.get(url, headers=self._headers())
+        response = http_clients.get_requests_session("graph").get(url, headers=self._headers())
         response.raise_for_status()
         return response.json().get('value', [])
 
@@ -236,7 +215,7 @@ class GraphClient:
             ]
         }
 
-        response = requests.post(url, headers=self._headers(), json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=self._headers(), json=body)
         response.raise_for_status()
 
         channel = response.json()
@@ -250,7 +229,7 @@ class GraphClient:
                 "content": content
             }
         }
-        response = requests.post(url, headers=self._headers(), json=body)
+        response = http_clients.get_requests_session("graph").post(url, headers=self._headers(), json=body)
         response.raise_for_status()
 
 
@@ -0,0 +1,93 @@
+"""
+Sheet Cache
+Process-wide cache for reference data read from Google Sheets (consultants,
+desk prompts) that changes rarely.
+
+The value is loaded on first use and reloaded by a background task every TTL,
+off the request path. If Sheets is unavailable the last good copy keeps being
+served.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SheetCache:
+    """A single cached value with lazy first load, background refresh and stale-on-error."""
+
+    def __init__(self, name: str, loader: Callable[[Optional[Any]], Any], ttl_seconds: int):
+        """
+        loader(previous) runs in a thread and returns the new value; it gets the
+        current value so it can reuse it when nothing changed.
+        """
+        self.name = name
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+
+        self._value = None
+        self._loaded_at = 0.0
+        self._last_error = None
+        self._lock = asyncio.Lock()
+        self._reloads = 0
+        self._reload_failures = 0
+
+    @property
+    def value(self) -> Optional[Any]:
+        """Current cached value without triggering a load (None until first load)."""
+        return self._value
+
+    def _load(self) -> bool:
+        """Run the loader (blocking). Returns False if it failed and the cached copy was kept."""
+        try:
+            value = self.loader(self._value)
+        except Exception as e:
+            self._last_error = str(e)
+            self._reload_failures += 1
+            if self._value is None:
+                raise
+            logger.warning(f"{self.name} reload failed — serving cached copy from "
+                           f"{time.time() - self._loaded_at:.0f}s ago: {e}")
+            return False
+
+        self._value = value
+        self._loaded_at = time.time()
+        self._last_error = None
+        self._reloads += 1
+        return True
+
+    async def reload(self) -> bool:
+        """Reload now (background refresher and admin endpoints)."""
+        async with self._lock:
+            return await asyncio.to_thread(self._load)
+
+    async def get(self) -> Any:
+        """Return the cached value, loading it on first use."""
+        if self._value is None:
+            async with self._lock:
+                if self._value is None:
+                    await asyncio.to_thread(self._load)
+        return self._value
+
+    async def run_refresher(self):
+        """Background task: reload every TTL."""
+        while True:
+            await asyncio.sleep(self.ttl_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"{self.name} refresh failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Age and reload counters (for /health)."""
+        return {
+            "loaded": self._value is not None,
+            "age_seconds": round(time.time() - self._loaded_at) if self._loaded_at else None,
+            "ttl_seconds": self.ttl_seconds,
+            "reloads": self._reloads,
+            "reload_failures": self._reload_failures,
+            "last_error": self._last_error,
+        }
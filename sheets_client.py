@@ -0,0 +1,79 @@
+"""
+Google Sheets Client
+One shared, thread-safe Sheets client factory for the whole process.
+
+Service account credentials are decoded once and shared, so the access token
+is fetched once and refreshed only when it expires. The Sheets v4 discovery
+document bundled with google-api-python-client is parsed once, so building a
+client never makes a discovery request.
+
+googleapiclient service objects are not thread-safe (they share one httplib2
+connection), so each thread gets its own lightweight service built from the
+cached document and credentials.
+"""
+
+import os
+import json
+import base64
+import logging
+import threading
+
+from google.oauth2 import service_account
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE", "meraki-n8n-automation-66a9d5aafc1e.json")
+GOOGLE_SERVICE_ACCOUNT_JSON = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")  # For Railway: base64 or raw JSON
+
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+_credentials = None
+_discovery_doc = None
+_init_lock = threading.Lock()
+_local = threading.local()
+
+
+def _load_credentials():
+    """Decode the service account once per process."""
+    # Use JSON from environment variable (Railway) or file (local)
+    if GOOGLE_SERVICE_ACCOUNT_JSON:
+        json_str = GOOGLE_SERVICE_ACCOUNT_JSON
+
+        # Try base64 decode first (for Railway)
+        try:
+            json_str = base64.b64decode(json_str).decode('utf-8')
+            logger.info("Decoded base64 service account JSON")
+        except Exception:
+            # Not base64, use as-is
+            pass
+
+        service_account_info = json.loads(json_str)
+        return service_account.Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+
+    return service_account.Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+
+
+def _init():
+    """Load credentials and the static discovery document (once)."""
+    global _credentials, _discovery_doc
+    if _credentials is not None:
+        return
+    with _init_lock:
+        if _credentials is None:
+            _discovery_doc = get_static_doc('sheets', 'v4')
+            if _discovery_doc is None:
+                raise RuntimeError("Bundled Sheets v4 discovery document not found in google-api-python-client")
+            _credentials = _load_credentials()
+
+
+def get_sheets_service():
+    """Return this thread's Sheets service, building it from cached credentials and discovery on first use."""
+    service = getattr(_local, "service", None)
+    if service is None:
+        _init()
+        service = build_from_document(_discovery_doc, credentials=_credentials)
+        _local.service = service
+    return service
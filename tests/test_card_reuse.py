@@ -0,0 +1,100 @@
+"""
+A stored card is reused on /retry only while the current prompts and routing
+would produce it again, and ?force=true discards it and runs Gemini again.
+"""
+
+import asyncio
+
+import artifact_store
+import call_notes_processor as processor
+import http_clients
+from disk_cache import DiskCache
+
+
+def _stored_route(prompts, desk, word_count):
+    route = prompts.router.route(desk, word_count)
+    return {'name': route.name, 'model': route.model, 'max_output_tokens': route.max_output_tokens,
+            'temperature': route.temperature, 'word_count': word_count, 'gemini_seconds': 1.0}
+
+
+def test_card_current_only_for_same_prompt_and_route():
+    prompts = processor.PromptSet({'Tech': 'Summarise {transcript}'})
+    version = prompts.for_desk('Tech').version
+    short = _stored_route(prompts, 'Tech', 500)
+
+    assert prompts.is_current('Tech', 500, version, short)
+    assert not prompts.is_current('Tech', 500, None, short)
+    assert not prompts.is_current('Tech', 500, version, None)
+
+    # Desk prompt edited
+    edited = processor.PromptSet({'Tech': 'Summarise in bullets {transcript}'})
+    assert not edited.is_current('Tech', 500, version, short)
+
+    # Routing changed: short calls now go to another model
+    rerouted = processor.PromptSet({'Tech': 'Summarise {transcript}'},
+                                   [['Route', 'Desk', 'Min Words', 'Max Words', 'Latency Target', 'Model'],
+                                    ['all', '', '', '', '', 'gemini-2.5-pro']])
+    assert not rerouted.is_current('Tech', 500, version, short)
+
+
+def test_force_delete_resumes_at_prompt(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "_conn", None)
+
+    for name in artifact_store.ARTIFACTS:
+        artifact_store.save("c1", name, {} if name in ("call_meta", "card") else "text", "2026-01-01")
+    assert artifact_store.first_missing("c1") is None
+
+    artifact_store.delete("c1", "prompt", "notes", "card")
+    assert artifact_store.first_missing("c1") == "prompt"
+    assert artifact_store.load("c1", "card") is None
+    assert artifact_store.load("c1", "transcript") == "text"
+
+
+class FakeGeminiSession:
+    """Answers generateContent with a numbered note, counting the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        session = self
+
+        class Response:
+            status = 200
+
+            async def json(self):
+                return {"candidates": [{"content": {"parts": [{"text": f"Notes v{session.calls}"}]}}]}
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Response()
+
+
+def test_forced_reprocess_calls_gemini_despite_cache(tmp_path, monkeypatch):
+    session = FakeGeminiSession()
+    monkeypatch.setattr(http_clients, "get_session", lambda upstream="default": session)
+    monkeypatch.setattr(processor, "_gemini_cache", DiskCache("Gemini cache", str(tmp_path / "gemini.sqlite3"), 10 ** 6))
+
+    prompts = processor.PromptSet({'Tech': 'Summarise {{transcript_text}}'})
+    consultant = {'Desk': 'Tech', 'Active': True, 'TeamsUserId': 'aad-1'}
+
+    def generate(bypass_cache):
+        return asyncio.run(processor.generate_call_note(
+            transcript="candidate said " * 400, consultant=consultant, consultant_name="Sam",
+            candidate_name="Alex", call_date="2026-01-01", source_label="test", sheets_service=None,
+            prompts=prompts, bypass_cache=bypass_cache,
+        ))
+
+    assert generate(False)["notes"] == "Notes v1"
+    assert generate(False)["notes"] == "Notes v1"  # a plain retry is a cache hit
+    assert session.calls == 1
+
+    assert generate(True)["notes"] == "Notes v2"  # forced: Gemini runs again
+    assert session.calls == 2
+    assert generate(False)["notes"] == "Notes v2"  # and its result replaces the cached one
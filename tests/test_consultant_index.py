@@ -0,0 +1,127 @@
+"""
+ConsultantIndex must return exactly what the linear scans it replaced returned.
+
+Run directly for a benchmark against those scans:
+    python tests/test_consultant_index.py [consultants] [queries]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import call_notes_processor as processor
+
+
+# The pre-index implementations, kept as the reference
+def linear_by_aircall_id(aircall_user_id, consultants):
+    for name_key, consultant_data in consultants.items():
+        if consultant_data.get('AircallUserId') == aircall_user_id:
+            return consultant_data, consultant_data['Name']
+    return None, ''
+
+
+def linear_by_name(name, consultants):
+    name_lower = name.lower()
+    sorted_consultants = sorted(consultants.items(), key=lambda x: len(x[0]), reverse=True)
+    for name_key, consultant_data in sorted_consultants:
+        if name_key in name_lower or name_lower in name_key:
+            return consultant_data, consultant_data['Name']
+    return None, ''
+
+
+def linear_in_filename(filename, consultants):
+    filename_lower = filename.lower()
+    sorted_consultants = sorted(consultants.items(), key=lambda x: len(x[0]), reverse=True)
+    for name_key, consultant_data in sorted_consultants:
+        if name_key in filename_lower:
+            return consultant_data, consultant_data['Name']
+    return None, ''
+
+
+def make_consultants(rng, count):
+    """Random directory with short, overlapping names and some shared/missing Aircall IDs."""
+    first = [''.join(rng.choices('abcde', k=rng.randint(2, 5))).title() for _ in range(max(10, count // 20))]
+    last = [''.join(rng.choices('abcde', k=rng.randint(2, 6))).title() for _ in range(max(10, count // 20))]
+    consultants = {}
+    for _ in range(count):
+        name = rng.choice(first) if rng.random() < 0.1 else f"{rng.choice(first)} {rng.choice(last)}"
+        consultants[name.lower()] = {
+            'Name': name,
+            'Email': '',
+            'Desk': rng.choice(['PE_VC', 'Compliance', 'Finance']),
+            'TeamsUserId': '',
+            'Active': True,
+            'AircallUserId': str(rng.randint(1, count)) if rng.random() < 0.8 else '',
+        }
+    return consultants
+
+
+def make_queries(rng, consultants, count):
+    names = [c['Name'] for c in consultants.values()]
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        name = rng.choice(names)
+        if kind < 0.3:
+            queries.append(name)
+        elif kind < 0.5:
+            queries.append(name[:rng.randint(1, len(name))])  # partial name
+        elif kind < 0.8:
+            queries.append(f"Call with {name} - {rng.randint(1, 28)} Jan 2026.pdf")
+        else:
+            queries.append(''.join(rng.choices(string.ascii_letters + ' ', k=rng.randint(1, 30))))
+    return queries
+
+
+def test_index_matches_linear_scans():
+    rng = random.Random(6)
+    for size in (1, 10, 200, 2000):
+        consultants = make_consultants(rng, size)
+        index = processor.ConsultantIndex(consultants)
+        for query in make_queries(rng, consultants, 500):
+            assert processor.find_consultant_by_name(query, index) == linear_by_name(query, consultants), query
+            assert processor.find_consultant_by_name(query, consultants) == linear_by_name(query, consultants), query
+            assert index.in_text(query.lower()) == linear_in_filename(query, consultants), query
+        for aircall_id in [str(i) for i in range(size + 5)] + ['', 'x']:
+            if aircall_id:
+                assert index.by_aircall_id(aircall_id) == linear_by_aircall_id(aircall_id, consultants), aircall_id
+
+
+def test_empty_lookups():
+    index = processor.ConsultantIndex({})
+    assert processor.find_consultant_by_name('Anyone', index) == (None, '')
+    assert processor.find_consultant_by_aircall_id('1', index) == (None, '')
+    assert processor.find_consultant_by_name('', {'a': {'Name': 'A'}}) == (None, '')
+
+
+def _bench(fn, queries):
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries)
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(6)
+    consultants = make_consultants(rng, size)
+    queries = make_queries(rng, consultants, count)
+    ids = [str(rng.randint(1, size)) for _ in range(count)]
+
+    started = time.perf_counter()
+    index = processor.ConsultantIndex(consultants)
+    print(f"{len(consultants)} consultants, {count} queries; index built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for label, linear, indexed, inputs in (
+        ("by name", lambda q: linear_by_name(q, consultants), lambda q: processor.find_consultant_by_name(q, index), queries),
+        ("by aircall id", lambda q: linear_by_aircall_id(q, consultants), index.by_aircall_id, ids),
+    ):
+        mismatches = sum(linear(q) != indexed(q) for q in inputs)
+        before, after = _bench(linear, inputs), _bench(indexed, inputs)
+        print(f"{label:>14}: linear {before * 1e6:9.1f} us  index {after * 1e6:7.1f} us  "
+              f"({before / after:.0f}x)  mismatches {mismatches}")
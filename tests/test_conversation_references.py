@@ -0,0 +1,103 @@
+"""
+The ConversationReferences writer must never overwrite another user's row,
+even when the startup read of the sheet failed.
+"""
+
+import re
+
+import pytest
+
+import main
+
+
+class GridSheets:
+    """Fake Sheets service backed by a list of rows; get() can be made to fail."""
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.fail_reads = 0
+        self.calls = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def _request(self, fn):
+        class Request:
+            def execute(self):
+                return fn()
+        return Request()
+
+    def get(self, spreadsheetId=None, range=None):
+        def read():
+            self.calls.append("get")
+            if self.fail_reads:
+                self.fail_reads -= 1
+                raise Exception("<HttpError 503 when requesting ... returned \"The service is currently unavailable.\">")
+            return {"values": [row[:1] if range.endswith("A:A") else row for row in self.rows]}
+        return self._request(read)
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        def write():
+            self.calls.append("batchUpdate")
+            for item in body["data"]:
+                row = int(re.search(r"!A(\d+)", item["range"]).group(1))
+                self.rows[row - 1] = item["values"][0]
+            return {}
+        return self._request(write)
+
+    def append(self, spreadsheetId=None, range=None, body=None, **kwargs):
+        def write():
+            self.calls.append("append")
+            start = len(self.rows) + 1
+            self.rows.extend(body["values"])
+            return {"updates": {"updatedRange": f"ConversationReferences!A{start}:C{len(self.rows)}"}}
+        return self._request(write)
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    sheets = GridSheets([
+        ["UserAADId", "ConversationReferenceJSON", "UpdatedAt"],
+        ["aad-alice", '{"user": "alice"}', "2026-01-01"],
+        ["aad-bob", '{"user": "bob"}', "2026-01-01"],
+    ])
+    monkeypatch.setattr(main, "get_sheets_service", lambda: sheets)
+    monkeypatch.setattr(main, "CONVERSATION_REFERENCES", {})
+    monkeypatch.setattr(main, "_CONV_REF_ROWS", {})
+    monkeypatch.setattr(main, "_CONV_REF_DIRTY", {})
+    monkeypatch.setattr(main, "_CONV_REF_INDEXED", False)
+    monkeypatch.setattr(main, "_CONV_REF_SHEET_EXISTS", True)
+    return sheets
+
+
+def test_failed_startup_read_does_not_overwrite_rows(sheet):
+    sheet.fail_reads = 2
+    main.load_conversation_references()  # 503 at startup
+    main.save_conversation_reference("aad-carol", {"user": "carol"})
+
+    main.flush_conversation_references()  # index read fails again: nothing written, carol re-queued
+    assert "batchUpdate" not in sheet.calls and "append" not in sheet.calls
+    assert "aad-carol" in main._CONV_REF_DIRTY
+
+    main.flush_conversation_references()
+    assert [row[0] for row in sheet.rows] == ["UserAADId", "aad-alice", "aad-bob", "aad-carol"]
+    assert sheet.rows[1][1] == '{"user": "alice"}'
+
+
+def test_existing_users_updated_in_place_and_new_users_appended(sheet):
+    main.load_conversation_references()
+    main.save_conversation_reference("aad-bob", {"user": "bob", "conversation": "new"})
+    main.save_conversation_reference("aad-dave", {"user": "dave"})
+    main.flush_conversation_references()
+
+    assert [row[0] for row in sheet.rows] == ["UserAADId", "aad-alice", "aad-bob", "aad-dave"]
+    assert sheet.rows[2][1] == '{"user": "bob", "conversation": "new"}'
+
+    # The appended row is indexed, so dave's next change updates it in place
+    main.save_conversation_reference("aad-dave", {"user": "dave", "conversation": "new"})
+    main.flush_conversation_references()
+    assert len(sheet.rows) == 4
+    assert sheet.rows[3][1] == '{"user": "dave", "conversation": "new"}'
@@ -0,0 +1,49 @@
+"""A resumed download must still pass its checksum when the server ignores Range."""
+
+import asyncio
+import hashlib
+
+from aiohttp import web
+
+import aircall_handler
+import http_clients
+
+RECORDING = bytes(range(256)) * 4096  # 1 MB
+
+
+async def _serve_ignoring_range(handler_calls):
+    async def recording(request):
+        handler_calls.append(request.headers.get("Range"))
+        return web.Response(body=RECORDING, headers={"ETag": f'"{hashlib.md5(RECORDING).hexdigest()}"'})
+
+    app = web.Application()
+    app.router.add_get("/recording.mp3", recording)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/recording.mp3"
+
+
+def test_resume_restarts_when_range_ignored(tmp_path):
+    dest_path = str(tmp_path / "call.mp3")
+    # A previous attempt left a partial file behind
+    with open(dest_path + ".part", "wb") as f:
+        f.write(RECORDING[:300_000])
+
+    async def run():
+        calls = []
+        runner, url = await _serve_ignoring_range(calls)
+        try:
+            recording = await aircall_handler.download_recording(url, dest_path)
+            with recording:
+                return calls, recording.read()
+        finally:
+            await http_clients.close()
+            await runner.cleanup()
+
+    calls, data = asyncio.run(run())
+
+    assert calls == ["bytes=300000-"]
+    assert data == RECORDING
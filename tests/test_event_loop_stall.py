@@ -0,0 +1,144 @@
+"""
+Regression test: a burst of Teams messages must not stall the event loop
+while the ConversationReferences sheet is slow. Handlers only update the
+in-memory references; the background writer persists them in a thread.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+import loop_monitor
+import main
+
+SHEETS_LATENCY_SECONDS = 0.2  # every Sheets call blocks this long
+MAX_LOOP_LAG_SECONDS = 0.05
+
+
+class SlowSheets:
+    """Fake Sheets service: every execute() blocks, like a slow API round trip."""
+
+    def __init__(self):
+        self.calls = []
+        self.rows_written = 0
+        self.next_row = 2
+        self.threads = set()
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def _request(self, method, body=None):
+        sheets = self
+
+        class Request:
+            def execute(self):
+                sheets.threads.add(threading.get_ident())
+                sheets.calls.append(method)
+                time.sleep(SHEETS_LATENCY_SECONDS)
+                if method == "batchUpdate":
+                    sheets.rows_written += len(body["data"])
+                if method == "append":
+                    start = sheets.next_row
+                    sheets.next_row += len(body["values"])
+                    sheets.rows_written += len(body["values"])
+                    return {"updates": {"updatedRange": f"ConversationReferences!A{start}:C{sheets.next_row - 1}"}}
+                return {}
+
+        return Request()
+
+    def get(self, **kwargs):
+        return self._request("get")
+
+    def update(self, **kwargs):
+        return self._request("update")
+
+    def append(self, **kwargs):
+        return self._request("append", kwargs.get("body"))
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        return self._request("batchUpdate", body)
+
+
+class FakeTurnContext:
+    def __init__(self, activity):
+        self.activity = activity
+        self.sent = []
+
+    async def send_activity(self, activity):
+        self.sent.append(activity)
+
+
+def message(user_index, n):
+    return Activity(
+        type=ActivityTypes.message,
+        id=f"activity-{user_index}-{n}",  # changes every message, like Teams
+        text="hello",
+        channel_id="msteams",
+        service_url="https://smba.example/emea/",
+        from_property=ChannelAccount(id=f"29:user-{user_index}", name=f"User {user_index}",
+                                     aad_object_id=f"aad-{user_index}"),
+        recipient=ChannelAccount(id="28:bot", name="Christina"),
+        conversation=ConversationAccount(id=f"a:conversation-{user_index}"),
+    )
+
+
+@pytest.fixture
+def slow_sheets(monkeypatch):
+    sheets = SlowSheets()
+    monkeypatch.setattr(main, "get_sheets_service", lambda: sheets)
+    monkeypatch.setattr(main, "CONVERSATION_REFERENCES", {})
+    monkeypatch.setattr(main, "_CONV_REF_ROWS", {})
+    monkeypatch.setattr(main, "_CONV_REF_DIRTY", {})
+    monkeypatch.setattr(main, "_CONV_REF_INDEXED", True)
+    monkeypatch.setattr(main, "_CONV_REF_SHEET_EXISTS", True)
+    monkeypatch.setattr(main, "CONV_REF_FLUSH_SECONDS", 0.05)
+    monkeypatch.setattr(loop_monitor, "LOOP_LAG_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(loop_monitor, "_recent", loop_monitor.deque(maxlen=loop_monitor.LOOP_LAG_WINDOW))
+    monkeypatch.setattr(loop_monitor, "_stats", {"samples": 0, "stalls": 0, "max_lag_ms": 0.0})
+    return sheets
+
+
+def test_message_burst_does_not_stall_loop(slow_sheets):
+    users, messages_per_user = 50, 4
+
+    async def burst():
+        monitor = asyncio.create_task(loop_monitor.run())
+        writer = asyncio.create_task(main.run_conversation_reference_writer())
+        await asyncio.sleep(0.05)  # let the monitor take a baseline sample
+
+        contexts = [FakeTurnContext(message(u, n)) for n in range(messages_per_user) for u in range(users)]
+        started = time.monotonic()
+        await asyncio.gather(*(main.on_turn(context) for context in contexts))
+        handled_in = time.monotonic() - started
+
+        # Let the writer persist the queue in the background
+        deadline = time.monotonic() + 5
+        while (main._CONV_REF_DIRTY or not slow_sheets.calls) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(SHEETS_LATENCY_SECONDS + 0.05)
+
+        for task in (monitor, writer):
+            task.cancel()
+        await asyncio.gather(monitor, writer, return_exceptions=True)
+        return contexts, handled_in
+
+    contexts, handled_in = asyncio.run(burst())
+
+    assert all(len(context.sent) == 1 for context in contexts)
+    # Handlers only touch the in-memory cache; they don't wait on Sheets
+    assert handled_in < SHEETS_LATENCY_SECONDS
+    stats = loop_monitor.stats()
+    assert stats["samples"] > 10
+    assert stats["max_lag_ms"] < MAX_LOOP_LAG_SECONDS * 1000, stats
+
+    # One reference per user reached the sheet, in a few batched calls made off the loop
+    assert slow_sheets.rows_written == users
+    assert slow_sheets.calls.count("batchUpdate") + slow_sheets.calls.count("append") <= 3
+    assert threading.main_thread().ident not in slow_sheets.threads
+    assert len(main.CONVERSATION_REFERENCES) == users
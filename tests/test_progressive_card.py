@@ -0,0 +1,27 @@
+"""A progressive card whose first post fails must not retry on every streamed chunk."""
+
+import asyncio
+
+import call_notes_processor as processor
+
+
+def test_failed_first_post_stops_streaming(monkeypatch):
+    attempts = []
+
+    async def updater(user_aad_id, card, activity_id):
+        attempts.append(activity_id)
+        return False, "User not registered", None
+
+    monkeypatch.setattr(processor, "_card_updater", updater)
+
+    async def stream():
+        card = processor.ProgressiveCard("aad-1", "Alex", "2026-01-01", "test")
+        text = ""
+        for i in range(50):
+            text += f"- point {i}: enough text to get past the first post threshold\n"
+            await card.update(text)
+        return card
+
+    card = asyncio.run(stream())
+    assert attempts == [None]
+    assert card.activity_id is None
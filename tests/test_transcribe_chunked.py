@@ -0,0 +1,79 @@
+"""A chunk that exhausts its retries must cancel the other chunk uploads."""
+
+import asyncio
+
+import pytest
+
+import aircall_handler
+import mp3_splitter
+
+
+class FakeTranscriptions:
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def create(self, model, file, language):
+        name = file.name
+        self.started.append(name)
+        if name.endswith("chunk0.mp3"):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upload rejected")
+        try:
+            await asyncio.sleep(0.5)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        self.finished.append(name)
+        return type("Response", (), {"text": name})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.audio = type("Audio", (), {})()
+        self.audio.transcriptions = FakeTranscriptions()
+
+    def with_options(self, **kwargs):
+        return self
+
+
+def make_chunks(tmp_path, count):
+    chunks = []
+    for i in range(count):
+        path = tmp_path / f"chunk{i}.mp3"
+        path.write_bytes(b"\xff\xfb")
+        chunks.append(mp3_splitter.Chunk(str(path), i * 1000, (i + 1) * 1000))
+    return chunks
+
+
+def test_failed_chunk_cancels_the_rest(tmp_path, monkeypatch):
+    monkeypatch.setattr(aircall_handler, "TRANSCRIBE_CHUNK_RETRIES", 1)
+    monkeypatch.setattr(aircall_handler, "TRANSCRIBE_CHUNK_CONCURRENCY", 4)
+    client = FakeClient()
+
+    async def run():
+        with pytest.raises(RuntimeError, match="upload rejected"):
+            await aircall_handler._transcribe_chunked(client, make_chunks(tmp_path, 6))
+        # Nothing is left running once the error reaches the caller
+        assert not [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    asyncio.run(run())
+    transcriptions = client.audio.transcriptions
+    assert transcriptions.finished == []
+    # Every other upload that got started was cancelled, and queued ones never ran
+    failed = [name for name in transcriptions.started if name.endswith("chunk0.mp3")]
+    assert sorted(transcriptions.cancelled) == sorted(set(transcriptions.started) - set(failed))
+    assert len(transcriptions.started) < 6
+
+
+def test_chunks_joined_in_order(tmp_path, monkeypatch):
+    client = FakeClient()
+
+    async def create(model, file, language):
+        await asyncio.sleep(0.01 * (5 - int(file.name[-5])))  # later chunks finish first
+        return type("Response", (), {"text": f"part {file.name[-5]}"})()
+
+    client.audio.transcriptions.create = create
+    text = asyncio.run(aircall_handler._transcribe_chunked(client, make_chunks(tmp_path, 5)))
+    assert text.split("\n\n") == [f"part {i}" for i in range(5)]
@@ -0,0 +1,40 @@
+"""
+Compaction of the transcripts in fixtures/compaction must match the
+.expected.txt next to each one — in particular numbers (salaries, phone
+numbers, years) must come through as said.
+"""
+
+import glob
+import os
+
+import pytest
+
+import transcript_compaction
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "compaction")
+CASES = sorted(os.path.basename(p)[:-len(".expected.txt")]
+               for p in glob.glob(os.path.join(FIXTURES, "*.expected.txt")))
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_compaction_fixture(case, monkeypatch):
+    monkeypatch.setattr(transcript_compaction, "TRANSCRIPT_COMPACTION_ENABLED", True)
+    result = transcript_compaction.compact(_read(case + ".txt"))
+    assert result.text == _read(case + ".expected.txt").rstrip("\n")
+    assert result.tokens_after <= result.tokens_before
+
+
+@pytest.mark.parametrize("text", [
+    "It was forty, forty-five thousand.",
+    "It's oh seven seven nine one one two.",
+    "I started in twenty twenty.",
+    "Call 0207 0207 946 0000.",
+])
+def test_numbers_kept(text, monkeypatch):
+    monkeypatch.setattr(transcript_compaction, "TRANSCRIPT_COMPACTION_ENABLED", True)
+    assert transcript_compaction.compact(text).text == text
@@ -0,0 +1,131 @@
+"""
+Transcript Compaction
+Deterministic clean-up of transcripts before they are sent to Gemini, so
+long calls cost fewer input tokens and less prefill time.
+
+- filler words ("um", "uh", "erm", ...) are removed; hyphenated backchannels
+  ("mm-hmm", "uh-huh") and units after a number ("5 mm") are left alone
+- stutters ("I I I think") collapse to one word; numbers ("twenty twenty",
+  "seven seven nine") and repeats split by a comma or hyphen
+  ("forty, forty-five") are kept as said
+- consecutive repeated sentences and lines ("Hello? Hello?") collapse to one
+- whitespace is normalised
+
+Nothing is reworded, so no information the candidate gave is lost. Token
+counts are estimated at ~4 characters per token.
+"""
+
+import os
+import re
+import logging
+from typing import Dict, Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TRANSCRIPT_COMPACTION_ENABLED = os.environ.get("TRANSCRIPT_COMPACTION_ENABLED", "true").lower() == "true"
+TRANSCRIPT_FILLERS = [w.strip().lower() for w in os.environ.get(
+    "TRANSCRIPT_FILLERS", "um,umm,uh,uhh,uhm,erm,er,hmm,mm,mhm"
+).split(",") if w.strip()]
+
+# Doubles that are often grammatical ("he said that that was fine") — left alone
+_KEEP_REPEATED = {"that", "had", "is", "no", "very", "really"}
+
+# Repeated numbers are content (phone numbers, years, salaries) — never collapsed
+_NUMBER_WORDS = {
+    "zero", "oh", "o", "nought", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+    "nineteen", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety",
+    "hundred", "thousand", "million", "billion", "k", "grand", "double", "triple",
+}
+
+# Whole words only: not part of "Mm-hmm"/"Uh-huh" backchannels, and not a unit after a number ("5 mm")
+_FILLER = re.compile(
+    r"(?:,\s*)?(?<![\w'-])(?<!\d\s)(?:" + "|".join(re.escape(w) for w in TRANSCRIPT_FILLERS) + r")(?![\w'-]),?",
+    re.IGNORECASE,
+) if TRANSCRIPT_FILLERS else None
+# Whole words repeated with only spaces between (not part of "forty-five" or "I'm")
+_REPEATED_WORD = re.compile(r"(?<![\w'-])(\w+)(?:[ \t]+\1)+(?![\w'-])", re.IGNORECASE)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_SPACES = re.compile(r"[ \t]+")
+_SPACE_BEFORE_PUNCT = re.compile(r" +([,.!?])")
+
+_stats = {"transcripts": 0, "tokens_before": 0, "tokens_after": 0}
+
+
+class Compaction(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _collapse_repeated_word(match: re.Match) -> str:
+    word = match.group(1)
+    lower = word.lower()
+    if lower in _KEEP_REPEATED or lower in _NUMBER_WORDS or any(c.isdigit() for c in word):
+        return match.group(0)
+    return word
+
+
+def _sentence_key(sentence: str) -> str:
+    return re.sub(r"[^\w]+", " ", sentence.lower()).strip()
+
+
+def _compact_line(line: str) -> str:
+    if _FILLER is not None:
+        line = _FILLER.sub(" ", line)
+    line = _REPEATED_WORD.sub(_collapse_repeated_word, line)
+    line = _SPACE_BEFORE_PUNCT.sub(r"\1", _SPACES.sub(" ", line)).strip()
+
+    sentences = []
+    for sentence in _SENTENCE_SPLIT.split(line):
+        if sentence and not (sentences and _sentence_key(sentence) == _sentence_key(sentences[-1])):
+            # A sentence that started with a filler may now start lower-case
+            sentences.append(sentence[:1].upper() + sentence[1:])
+    return " ".join(sentences)
+
+
+def compact(transcript: str) -> Compaction:
+    """Return the compacted transcript with before/after token estimates."""
+    tokens_before = estimate_tokens(transcript)
+    if not TRANSCRIPT_COMPACTION_ENABLED:
+        return Compaction(transcript, tokens_before, tokens_before)
+
+    lines = []
+    previous_key = None
+    for raw_line in transcript.splitlines():
+        line = _compact_line(raw_line)
+        key = _sentence_key(line)
+        if not line:
+            # Keep single blank lines as paragraph breaks
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if key == previous_key:
+            continue
+        lines.append(line)
+        previous_key = key
+
+    text = "\n".join(lines).strip()
+    tokens_after = estimate_tokens(text)
+
+    _stats["transcripts"] += 1
+    _stats["tokens_before"] += tokens_before
+    _stats["tokens_after"] += tokens_after
+    return Compaction(text, tokens_before, tokens_after)
+
+
+def stats() -> Dict[str, Any]:
+    """Estimated tokens saved across all compacted transcripts (for /health)."""
+    saved = _stats["tokens_before"] - _stats["tokens_after"]
+    return dict(
+        _stats,
+        enabled=TRANSCRIPT_COMPACTION_ENABLED,
+        tokens_saved=saved,
+        saved_ratio=round(saved / _stats["tokens_before"], 3) if _stats["tokens_before"] else None,
+    )
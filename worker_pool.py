@@ -0,0 +1,152 @@
+"""
+Bounded Worker Pool
+Fixed number of worker tasks fed by an in-process job queue.
+
+Aircall webhooks hand call jobs to the pool and return immediately. The pool
+caps how many calls are downloaded/transcribed/summarised at once; when the
+queue is full, jobs spill to a bounded backlog, and once that is full too
+they are shed so the caller can tell Aircall to retry later.
+
+Workers are coroutines on the aiohttp event loop — a call waiting on
+Aircall, Azure or Gemini costs a task, not an OS thread. start() and submit()
+must be called from that loop.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+WORKER_POOL_SIZE = int(os.environ.get("WORKER_POOL_SIZE", "16"))
+JOB_QUEUE_MAX_DEPTH = int(os.environ.get("JOB_QUEUE_MAX_DEPTH", "50"))
+JOB_BACKLOG_MAX = int(os.environ.get("JOB_BACKLOG_MAX", "200"))
+
+# Submit outcomes
+QUEUED = "queued"
+BACKLOGGED = "backlogged"
+SHED = "shed"
+
+
+class WorkerPool:
+    """Fixed number of worker tasks consuming a bounded job queue."""
+
+    def __init__(self, handler: Callable[[Any], Awaitable[None]], size: int = WORKER_POOL_SIZE,
+                 max_depth: int = JOB_QUEUE_MAX_DEPTH, backlog_max: int = JOB_BACKLOG_MAX,
+                 name: str = "worker"):
+        self.handler = handler
+        self.size = size
+        self.max_depth = max_depth
+        self.backlog_max = backlog_max
+        self.name = name
+
+        self._queue = None  # created in start(), on the running loop
+        self._backlog = deque()
+        self._tasks = []
+
+        # Stats
+        self._active = 0
+        self._processed = 0
+        self._failed = 0
+        self._shed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    def start(self):
+        """Start the worker tasks on the running event loop (idempotent)."""
+        if self._tasks:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        for i in range(self.size):
+            self._tasks.append(asyncio.create_task(self._run(), name=f"{self.name}-{i}"))
+
+        logger.info(f"Worker pool started: {self.size} workers, queue depth {self.max_depth}, "
+                    f"backlog {self.backlog_max}")
+
+    async def stop(self):
+        """Cancel the worker tasks (app shutdown). Unfinished jobs stay pending in the job store."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: Any) -> str:
+        """
+        Enqueue a job without blocking.
+        Returns QUEUED, BACKLOGGED (queue full, spilled to backlog) or SHED (both full).
+        """
+        item = (time.monotonic(), job)
+
+        # Keep FIFO order: nothing jumps the backlog
+        if not self._backlog:
+            try:
+                self._queue.put_nowait(item)
+                return QUEUED
+            except asyncio.QueueFull:
+                pass
+
+        if len(self._backlog) < self.backlog_max:
+            self._backlog.append(item)
+            return BACKLOGGED
+
+        self._shed += 1
+        return SHED
+
+    def _refill_from_backlog(self):
+        """Move backlogged jobs into the queue as space frees up."""
+        while self._backlog:
+            try:
+                self._queue.put_nowait(self._backlog[0])
+            except asyncio.QueueFull:
+                return
+            self._backlog.popleft()
+
+    async def _run(self):
+        """Worker loop."""
+        while True:
+            enqueued_at, job = await self._queue.get()
+            self._refill_from_backlog()
+
+            wait = time.monotonic() - enqueued_at
+            self._active += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._wait_last = wait
+
+            try:
+                await self.handler(job)
+                self._processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unhandled error in {asyncio.current_task().get_name()}: {e}")
+                self._failed += 1
+            finally:
+                self._active -= 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, worker activity and wait times (for /health)."""
+        started = self._processed + self._failed + self._active
+        return {
+            "workers": self.size,
+            "active_workers": self._active,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_max_depth": self.max_depth,
+            "backlog_depth": len(self._backlog),
+            "backlog_max": self.backlog_max,
+            "processed": self._processed,
+            "failed": self._failed,
+            "shed": self._shed,
+            "wait_seconds": {
+                "last": round(self._wait_last, 3),
+                "avg": round(self._wait_total / started, 3) if started else 0.0,
+                "max": round(self._wait_max, 3),
+            },
+        }